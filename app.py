@@ -1,40 +1,93 @@
-from flask import Flask, render_template, request, jsonify
-from src.matcher import SmartMatcher
+from flask import Flask, Response, render_template, request, jsonify, abort, url_for
+from src.jobs import JobManager
+from src.matcher import MatchContext, SmartMatcher
+from src.metrics import REGISTRY
 import os
 
 app = Flask(__name__)
 
-# Initialize matcher globally to load data once; reinitialize when role changes.
+# Initialize matcher globally to load data once; role filters are row views over the shared index.
 matcher = SmartMatcher()
 
+
+def run_match(job):
+    # Each job reports through its own context; the index snapshot is shared read-only.
+    ctx = MatchContext()
+    job.progress = ctx.progress
+    candidates = matcher.match(job.params["jd"], target_role=job.params["role"], context=ctx)
+    job.error = ctx.error
+    job.timings = ctx.timings
+    return candidates
+
+
+# Matching runs on background workers; request threads only enqueue and poll.
+jobs = JobManager(run_match)
+
 @app.route('/')
 def index():
     return render_template('index.html')
 
 @app.route('/match', methods=['POST'])
 def match():
-    jd_text = request.form.get('jd', '').strip()
-    target_role = request.form.get('role', '').strip() or None
+    data = request.get_json(silent=True) or request.form
+    jd_text = (data.get('jd') or '').strip()
+    target_role = (data.get('role') or '').strip() or None
 
     if not jd_text:
-        return render_template('index.html', error="Please provide a Job Description.", role=target_role)
-    
-    # Run matching with optional role filter
-    candidates = matcher.match(jd_text, target_role=target_role)
-    if matcher.last_error:
-        return render_template('index.html', error=matcher.last_error, jd=jd_text, role=target_role, progress=matcher.last_progress)
-    
-    return render_template('index.html', candidates=candidates, jd=jd_text, role=target_role, progress=matcher.last_progress)
+        return jsonify({"error": "Please provide a Job Description."}), 400
+
+    # Enqueue and return immediately; clients poll /jobs/<id> for progress and results
+    job = jobs.submit(jd=jd_text, role=target_role)
+    status_url = url_for('get_job', job_id=job.id)
+    return jsonify({"job_id": job.id, "state": job.state, "status_url": status_url}), 202, {"Location": status_url}
+
+
+@app.route('/jobs/<job_id>')
+def get_job(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        abort(404)
+    cursor = request.args.get('cursor', type=int)
+    # ?timings=1 adds the per-stage timings (seconds) of a finished job
+    include_timings = request.args.get('timings', '0') not in ('0', '', 'false')
+    return jsonify(job.to_dict(cursor=cursor, include_timings=include_timings))
+
+
+@app.route('/jobs/<job_id>/view')
+def view_job(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        abort(404)
+    jd_text, target_role = job.params["jd"], job.params["role"]
+    if job.state == "error":
+        return render_template('index.html', error=job.error, jd=jd_text, role=target_role)
+    return render_template('index.html', candidates=job.result or [], jd=jd_text, role=target_role)
+
+
+@app.route('/candidates', methods=['POST'])
+def ingest_candidates():
+    # Body: a JSON list of candidate records, or {"candidates": [...]}; records need an "id".
+    # Records are stored in INGEST_DB_PATH (not the parquet) and replayed on every index build.
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get('candidates')
+    if not isinstance(data, list):
+        return jsonify({"error": "Expected a JSON list of candidates."}), 400
+    return jsonify(matcher.ingest(data))
 
 
 @app.route('/get_progress')
 def get_progress():
-    progress_data = {
-        "percentage": getattr(matcher, 'current_percent', 0),
-        "status": getattr(matcher, 'current_status', "Initializing..."),
-        "logs": getattr(matcher, 'last_progress', []),
-    }
-    return jsonify(progress_data)
+    # Legacy: progress of matches run without a job context (e.g. direct matcher.match calls).
+    # Clients pass back the cursor from the previous poll to receive only new log lines.
+    cursor = request.args.get('cursor', type=int)
+    return jsonify(matcher.progress.snapshot(cursor=cursor))
+
+
+@app.route('/metrics')
+def metrics():
+    # Prometheus scrape endpoint; counters are per process (one set per gunicorn worker)
+    return Response(REGISTRY.render(), mimetype="text/plain; version=0.0.4")
 
 if __name__ == '__main__':
     # Ensure templates directory exists
@@ -0,0 +1,252 @@
+"""
+Benchmark candidate loading, index initialization and Stage-1 matching.
+
+Usage:
+1. python benchmarks/bench_stage1.py
+- Generates (or reuses) benchmarks/data/candidates_<n>.parquet for 1k/10k/50k/200k rows
+- For every size runs two fresh processes: "cold" (empty feature/index caches) and "warm" (caches built)
+- Times DataLoader._ensure_loaded, SmartMatcher._ensure_initialized, Stage-1 and the whole match()
+- Prints one JSON report (latency percentiles in ms, peak RSS, throughput) and writes it to --out
+
+2. python benchmarks/bench_stage1.py --sizes 1000,10000 --repeat 50 --out bench_before.json
+- Smaller run; compare two reports with any JSON diff tool
+
+The LLM is replaced by StubLLMService, which returns canned JD analyses and fit
+scores without network calls, so numbers only reflect local work. Matcher settings
+(STAGE1_WORKERS, SKILL_PREFILTER, HARD_FILTER, ...) are read from the environment
+as usual and recorded in the report.
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, PROJECT_ROOT)
+
+from benchmarks.generate_candidates import write_parquet  # noqa: E402
+
+# Environment variables worth recording next to the numbers
+SETTINGS = [
+    "TOP_K_RESULTS", "STAGE1_LIMIT", "STAGE2_LIMIT", "STAGE1_WORKERS", "STAGE1_MIN_SHARD_ROWS",
+    "SKILL_PREFILTER", "HARD_FILTER", "RETRIEVAL_SHORTLIST", "VECTOR_INDEX_BACKEND", "INDEX_MMAP",
+]
+
+QUERIES = [
+    ("Senior Data Engineer to build Spark and Airflow pipelines on AWS. Python and SQL required, Kafka is a plus.", None, {
+        "role_title": "Data Engineer", "role_keywords": ["data", "spark", "airflow", "pipelines"],
+        "hard_requirements": {"min_experience_years": 4, "required_skills": ["Python", "Spark", "AWS S3"], "english_level": "upper"},
+        "soft_requirements": {"traits": ["ownership"], "preferred": ["Kafka"]},
+    }),
+    ("Backend Python developer (Django/FastAPI, PostgreSQL, Docker) for a fintech product, remote.", "Python", {
+        "role_title": "Python Developer", "role_keywords": ["python", "django", "backend", "remote"],
+        "hard_requirements": {"min_experience_years": 2, "required_skills": ["Django", "PostgreSQL"], "english_level": "intermediate"},
+        "soft_requirements": {"traits": [], "preferred": ["FastAPI"]},
+    }),
+    ("React/TypeScript frontend engineer for an e-commerce marketplace.", "Frontend", {
+        "role_title": "Frontend Developer", "role_keywords": ["react", "typescript", "frontend"],
+        "hard_requirements": {"min_experience_years": 3, "required_skills": ["React", "TypeScript"], "english_level": None},
+        "soft_requirements": {"traits": [], "preferred": ["Next.js"]},
+    }),
+    ("DevOps engineer: Kubernetes, Terraform, CI/CD on AWS or GCP, strong Linux.", None, {
+        "role_title": "DevOps Engineer", "role_keywords": ["devops", "kubernetes", "terraform"],
+        "hard_requirements": {"min_experience_years": 3, "required_skills": ["Kubernetes", "Terraform"], "english_level": "upper"},
+        "soft_requirements": {"traits": [], "preferred": ["Prometheus"]},
+    }),
+    ("QA automation engineer with Selenium or Playwright and API testing experience.", "QA", {
+        "role_title": "QA Engineer", "role_keywords": ["qa", "automation", "testing"],
+        "hard_requirements": {"min_experience_years": 1, "required_skills": ["Selenium"], "english_level": "pre"},
+        "soft_requirements": {"traits": [], "preferred": []},
+    }),
+]
+
+
+class StubLLMService:
+    """Drop-in for LLMService with canned answers and no network access."""
+
+    def __init__(self):
+        self.api_key = "stub"
+        self._analyses = {jd: analysis for jd, _, analysis in QUERIES}
+
+    def analyze_jd(self, jd_text):
+        return json.loads(json.dumps(self._analyses.get(jd_text, QUERIES[0][2])))
+
+    def score_candidate_for_jd(self, jd_text, candidate_summary):
+        return {"fit_score": 50 + len(candidate_summary or "") % 50, "strengths": [], "risks": [], "verdict": "stub"}
+
+    def parse_resume(self, resume_text):
+        return {}
+
+
+def _percentiles(samples):
+    ms = np.asarray(samples, dtype=np.float64) * 1000.0
+    if not len(ms):
+        return {}
+    return {
+        "count": int(len(ms)),
+        "mean_ms": round(float(ms.mean()), 3),
+        "min_ms": round(float(ms.min()), 3),
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p90_ms": round(float(np.percentile(ms, 90)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3),
+        "max_ms": round(float(ms.max()), 3),
+    }
+
+
+def _peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)
+
+
+def run_worker(data_path, repeat, warmup):
+    """Benchmark one parquet file in this process and return the measurements."""
+    from src.matcher import SmartMatcher
+
+    matcher = SmartMatcher()
+    matcher.data_loader.data_path = os.path.abspath(data_path)
+    matcher.llm = StubLLMService()
+
+    start = time.perf_counter()
+    matcher.data_loader._ensure_loaded()
+    load_sec = time.perf_counter() - start
+    rss_after_load = _peak_rss_mb()
+
+    start = time.perf_counter()
+    index = matcher._ensure_initialized()
+    init_sec = time.perf_counter() - start
+
+    stage1_times, pool_sizes = [], []
+    stage1_top = matcher._stage1_top
+
+    def timed_stage1_top(index, jd_analysis, jd_vec, jd_skill_vec, rows, keep):
+        t = time.perf_counter()
+        out = stage1_top(index, jd_analysis, jd_vec, jd_skill_vec, rows, keep)
+        stage1_times.append(time.perf_counter() - t)
+        pool_sizes.append(len(index) if rows is None else len(rows))
+        return out
+
+    matcher._stage1_top = timed_stage1_top
+    for i in range(warmup):
+        jd, role, _ = QUERIES[i % len(QUERIES)]
+        matcher.match(jd, target_role=role)
+    stage1_times.clear()
+    pool_sizes.clear()
+
+    match_times = []
+    for i in range(repeat):
+        jd, role, _ = QUERIES[i % len(QUERIES)]
+        t = time.perf_counter()
+        matcher.match(jd, target_role=role)
+        match_times.append(time.perf_counter() - t)
+
+    total_match = sum(match_times)
+    total_stage1 = sum(stage1_times)
+    return {
+        "rows": len(index),
+        "load_sec": round(load_sec, 4),
+        "init_sec": round(init_sec, 4),
+        "match": _percentiles(match_times),
+        "stage1": _percentiles(stage1_times),
+        "matches_per_sec": round(len(match_times) / total_match, 3) if total_match else None,
+        "stage1_candidates_per_sec": round(sum(pool_sizes) / total_stage1, 1) if total_stage1 else None,
+        "rss_after_load_mb": rss_after_load,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def _git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT, capture_output=True, text=True, timeout=10)
+        return out.stdout.strip() or None
+    except Exception:
+        return None
+
+
+def run_size(path, repeat, warmup, keep_cache):
+    """Cold then warm run of one file, each in a fresh interpreter."""
+    cache_dir = tempfile.mkdtemp(prefix="smarthr-bench-")
+    env = dict(os.environ)
+    env.update({
+        "FEATURE_CACHE_DIR": os.path.join(cache_dir, "features"),
+        "INDEX_CACHE_DIR": os.path.join(cache_dir, "index"),
+        "PARSED_DB_PATH": os.path.join(cache_dir, "parsed_data.db"),
+        "MAX_CANDIDATES": str(10 ** 9),
+        "PROGRESS_ECHO": "0",
+    })
+    runs = []
+    try:
+        for state in ("cold", "warm"):
+            cmd = [sys.executable, os.path.abspath(__file__), "--worker", path, "--repeat", str(repeat), "--warmup", str(warmup)]
+            proc = subprocess.run(cmd, cwd=PROJECT_ROOT, env=env, capture_output=True, text=True)
+            if proc.returncode != 0:
+                runs.append({"cache": state, "error": proc.stderr.strip().splitlines()[-1:] or ["failed"]})
+                continue
+            result = json.loads(proc.stdout.strip().splitlines()[-1])
+            runs.append({"cache": state, **result})
+    finally:
+        if not keep_cache:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+    return runs
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="1000,10000,50000,200000", help="comma-separated row counts")
+    parser.add_argument("--data-dir", default=os.path.join(BENCH_DIR, "data"))
+    parser.add_argument("--repeat", type=int, default=20, help="timed match() calls per run")
+    parser.add_argument("--warmup", type=int, default=2, help="untimed match() calls before measuring")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default=None, help="also write the JSON report here")
+    parser.add_argument("--keep-cache", action="store_true", help="keep the temporary feature/index caches")
+    parser.add_argument("--worker", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(args.worker, args.repeat, args.warmup)))
+        return
+
+    results = []
+    for n in (int(x) for x in args.sizes.split(",") if x.strip()):
+        path = os.path.join(args.data_dir, f"candidates_{n}.parquet")
+        if not os.path.exists(path):
+            print(f"Generating {path}...", file=sys.stderr)
+            write_parquet(path, n, seed=args.seed)
+        print(f"Benchmarking {n} rows...", file=sys.stderr)
+        for run in run_size(path, args.repeat, args.warmup, args.keep_cache):
+            results.append({"size": n, **run})
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "repeat": args.repeat,
+            "warmup": args.warmup,
+            "seed": args.seed,
+            "settings": {k: os.environ[k] for k in SETTINGS if k in os.environ},
+        },
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Generate synthetic candidate parquet files with the Djinni column layout.
+
+Usage:
+1. python benchmarks/generate_candidates.py --rows 10000 --out benchmarks/data/candidates_10k.parquet
+- Writes 10k candidates with Position, Primary Keyword, English Level, Experience Years,
+  Looking For, Highlights, Moreinfo, CV, CV_lang and id columns
+- Output is deterministic for a given --seed, so runs are comparable between commits
+
+2. python benchmarks/generate_candidates.py --sizes 1000,10000,50000,200000 --out-dir benchmarks/data
+- Writes one candidates_<n>.parquet per size
+"""
+
+import argparse
+import os
+import random
+import uuid
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Position -> (primary keywords, skills commonly listed next to them)
+ROLES = {
+    "Python Developer": (["Python", "Django", "Flask"], ["FastAPI", "PostgreSQL", "Redis", "Celery", "Docker", "AWS", "REST API", "SQLAlchemy"]),
+    "Senior Python Developer": (["Python"], ["Django", "Kubernetes", "Kafka", "PostgreSQL", "AWS", "microservices", "asyncio"]),
+    "Data Engineer": (["Python", "SQL", "Scala"], ["Spark", "Airflow", "Kafka", "dbt", "Snowflake", "AWS S3", "Redshift", "ETL"]),
+    "Data Analyst": (["SQL", "Python"], ["Tableau", "Power BI", "Excel", "pandas", "A/B testing", "Looker", "statistics"]),
+    "Data Scientist": (["Python", "Machine Learning"], ["PyTorch", "scikit-learn", "NLP", "pandas", "TensorFlow", "statistics", "MLflow"]),
+    "Java Developer": (["Java"], ["Spring Boot", "Hibernate", "Kafka", "PostgreSQL", "microservices", "Maven", "Docker"]),
+    "Frontend Developer": (["JavaScript", "React", "Angular"], ["TypeScript", "Redux", "Vue.js", "HTML", "CSS", "Next.js", "Webpack"]),
+    "Full Stack Developer": (["JavaScript", "Node.js"], ["React", "TypeScript", "MongoDB", "Express", "GraphQL", "Docker", "AWS"]),
+    ".NET Developer": ([".NET", "C#"], ["ASP.NET Core", "Entity Framework", "MS SQL", "Azure", "microservices", "LINQ"]),
+    "DevOps Engineer": (["DevOps", "Kubernetes"], ["Terraform", "AWS", "Docker", "CI/CD", "Ansible", "Prometheus", "Linux", "GCP"]),
+    "QA Engineer": (["QA", "QA Automation"], ["Selenium", "Cypress", "Postman", "Jira", "TestRail", "API testing", "Playwright"]),
+    "iOS Developer": (["iOS", "Swift"], ["SwiftUI", "UIKit", "Combine", "Core Data", "Xcode", "Objective-C"]),
+    "Android Developer": (["Android", "Kotlin"], ["Jetpack Compose", "Coroutines", "Room", "Retrofit", "Java", "Dagger"]),
+    "Project Manager": (["Project Manager"], ["Scrum", "Agile", "Jira", "Confluence", "risk management", "stakeholder management"]),
+    "UI/UX Designer": (["Design", "UI/UX"], ["Figma", "Sketch", "Adobe XD", "prototyping", "user research", "Photoshop"]),
+    "2D Artist": (["Design", "Art"], ["Photoshop", "Illustrator", "Spine", "concept art", "Unity", "animation"]),
+}
+SENIORITY = ["", "Junior ", "Middle ", "Senior ", "Lead "]
+# Roughly the level mix of the Djinni CV dump
+ENGLISH_LEVELS = ["no_english", "basic", "pre", "intermediate", "upper", "fluent"]
+ENGLISH_WEIGHTS = [2, 8, 15, 35, 30, 10]
+DOMAINS = ["fintech", "e-commerce", "healthcare", "gaming", "adtech", "logistics", "edtech", "SaaS", "banking", "telecom"]
+LOOKING_FOR = [
+    "remote work", "product company", "international team", "flexible schedule", "growth opportunities",
+    "modern tech stack", "no legacy code", "startup environment", "relocation support", "part-time",
+]
+VERBS = ["Developed", "Designed", "Maintained", "Migrated", "Optimized", "Led", "Automated", "Implemented", "Refactored", "Built"]
+OBJECTS = [
+    "a data pipeline processing {n}M events per day", "the REST API for a {d} platform", "CI/CD for {n} services",
+    "a reporting dashboard used by {n}0 analysts", "the payment module of a {d} product", "an internal admin panel",
+    "a recommendation service for a {d} marketplace", "monitoring and alerting for production", "the legacy monolith into microservices",
+    "integration tests covering {n}0% of the codebase",
+]
+
+
+def _experience(r, seniority):
+    base = {"": 2.0, "Junior ": 0.5, "Middle ": 2.5, "Senior ": 5.0, "Lead ": 7.0}[seniority]
+    return round(min(15.0, max(0.0, base + r.expovariate(0.6))) * 2) / 2
+
+
+def _cv(r, position, skills, years):
+    lines = [f"{position} with {years:g} years of commercial experience."]
+    for _ in range(r.randint(2, 8)):
+        obj = r.choice(OBJECTS).format(n=r.randint(1, 9), d=r.choice(DOMAINS))
+        lines.append(f"{r.choice(VERBS)} {obj} using {', '.join(r.sample(skills, k=min(len(skills), r.randint(1, 3))))}.")
+    lines.append(f"Tech stack: {', '.join(r.sample(skills, k=min(len(skills), r.randint(3, 6))))}.")
+    return " ".join(lines)
+
+
+def generate_rows(n, seed=0, start=0):
+    """Yield ``n`` candidate dicts; row ``i`` depends only on ``seed`` and ``start + i``."""
+    names = list(ROLES)
+    for i in range(start, start + n):
+        r = random.Random(f"{seed}:{i}")
+        role = r.choice(names)
+        keywords, skills = ROLES[role]
+        seniority = r.choice(SENIORITY)
+        years = _experience(r, seniority)
+        position = f"{seniority}{role}"
+        yield {
+            "Position": position,
+            "Moreinfo": f"Worked in {r.choice(DOMAINS)} and {r.choice(DOMAINS)}. " + ", ".join(r.sample(skills, k=min(len(skills), 3))),
+            "Looking For": ", ".join(r.sample(LOOKING_FOR, k=r.randint(0, 3))),
+            "Highlights": ", ".join(r.sample(skills, k=min(len(skills), r.randint(0, 4)))),
+            "Primary Keyword": r.choice(keywords),
+            "English Level": r.choices(ENGLISH_LEVELS, weights=ENGLISH_WEIGHTS)[0],
+            "Experience Years": years,
+            "CV": _cv(r, position, skills, years),
+            "CV_lang": "en",
+            "id": str(uuid.UUID(int=r.getrandbits(128))),
+        }
+
+
+def write_parquet(path, n, seed=0, chunk_rows=20000):
+    """Write ``n`` rows in chunks so 200k-row files do not need the whole table in memory."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    writer = None
+    try:
+        for start in range(0, n, chunk_rows):
+            rows = list(generate_rows(min(chunk_rows, n - start), seed=seed, start=start))
+            table = pa.Table.from_pylist(rows)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=None)
+    parser.add_argument("--out", default=None)
+    parser.add_argument("--sizes", default="1000,10000,50000,200000", help="comma-separated row counts (with --out-dir)")
+    parser.add_argument("--out-dir", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "data"))
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.rows:
+        out = args.out or os.path.join(args.out_dir, f"candidates_{args.rows}.parquet")
+        print(write_parquet(out, args.rows, seed=args.seed))
+        return
+    for n in (int(x) for x in args.sizes.split(",") if x.strip()):
+        print(write_parquet(os.path.join(args.out_dir, f"candidates_{n}.parquet"), n, seed=args.seed))
+
+
+if __name__ == "__main__":
+    main()
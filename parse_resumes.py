@@ -0,0 +1,135 @@
+"""
+Bulk-parse candidate resumes into the parsed_resumes cache.
+
+Usage:
+1. python parse_resumes.py --limit 1000 --concurrency 4 --rate 2
+- Streams candidates from DataLoader in batches of --batch-size
+- Skips candidates whose Long Description hash is already cached
+- Sends parse requests concurrently (at most --rate requests/sec), retrying failures
+- Writes each batch back in one transaction and prints throughput / cache hit ratio
+
+2. python parse_resumes.py --role "Data Engineer" --batch-size 100
+- Only parses candidates whose Position contains the given role
+
+Progress is committed batch by batch, so re-running after a crash resumes where it stopped.
+"""
+
+import argparse
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.cache_manager import CacheManager
+from src.data_loader import DataLoader
+
+
+class RateLimiter:
+    """Thread-safe limiter spacing calls at least 1/rate seconds apart."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate and rate > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next = time.monotonic()
+
+    def acquire(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if wait > 0:
+            time.sleep(wait)
+
+
+def parse_with_retries(llm, limiter, text, retries, backoff):
+    """Returns the parsed dict, or None once all attempts failed."""
+    for attempt in range(retries + 1):
+        limiter.acquire()
+        parsed = llm.parse_resume(text)
+        # parse_resume post-processes a failed call into an empty dict
+        if parsed:
+            return parsed
+        if attempt < retries:
+            time.sleep(backoff * (2 ** attempt))
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--data", default="candidates.parquet")
+    parser.add_argument("--role", default=None, help="only parse candidates whose Position contains this text")
+    parser.add_argument("--limit", type=int, default=0, help="stop after this many candidates (0 = all)")
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--rate", type=float, default=2.0, help="max LLM requests per second (0 = unlimited)")
+    parser.add_argument("--retries", type=int, default=2)
+    parser.add_argument("--backoff", type=float, default=1.0, help="base seconds for exponential retry backoff")
+    args = parser.parse_args()
+
+    loader = DataLoader(data_path=args.data)
+    cache: CacheManager = loader.cache
+    llm = loader.llm
+    if not llm.api_key:
+        raise SystemExit("LLM API key not configured; nothing to do.")
+
+    candidates = loader.load_candidates(position_filter=args.role)
+    if args.limit:
+        candidates = candidates[: args.limit]
+    total = len(candidates)
+    print(f"Parsing up to {total} candidates (batch {args.batch_size}, concurrency {args.concurrency}, rate {args.rate}/s)")
+
+    limiter = RateLimiter(args.rate)
+    stats = {"seen": 0, "cache_hits": 0, "parsed": 0, "failed": 0}
+    start = time.monotonic()
+
+    with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as pool:
+        for offset in range(0, total, args.batch_size):
+            batch = candidates[offset: offset + args.batch_size]
+            texts = {}
+            for cand in batch:
+                cand_id = cand.get("id")
+                if cand_id is None:
+                    continue
+                text = cand.get("Long Description", "")
+                texts[str(cand_id)] = (CacheManager.compute_hash(text), text)
+
+            cached = cache.get_many((cand_id, h) for cand_id, (h, _) in texts.items())
+            todo = {cand_id: v for cand_id, v in texts.items() if cand_id not in cached}
+            futures = {
+                cand_id: pool.submit(parse_with_retries, llm, limiter, text, args.retries, args.backoff)
+                for cand_id, (_, text) in todo.items()
+            }
+
+            results = []
+            for cand_id, fut in futures.items():
+                parsed = fut.result()
+                if parsed:
+                    results.append((cand_id, todo[cand_id][0], parsed))
+                else:
+                    stats["failed"] += 1
+            cache.set_many(results)
+
+            stats["seen"] += len(texts)
+            stats["cache_hits"] += len(cached)
+            stats["parsed"] += len(results)
+            elapsed = max(1e-9, time.monotonic() - start)
+            print(
+                f"[{min(offset + len(batch), total)}/{total}] parsed {stats['parsed']} "
+                f"({stats['parsed'] / elapsed:.2f} resumes/sec), "
+                f"cache hit ratio {stats['cache_hits'] / max(1, stats['seen']):.1%}, failed {stats['failed']}"
+            )
+
+    elapsed = time.monotonic() - start
+    summary = {
+        **stats,
+        "elapsed_sec": round(elapsed, 2),
+        "resumes_per_sec": round(stats["parsed"] / elapsed, 3) if elapsed > 0 else 0.0,
+        "cache_hit_ratio": round(stats["cache_hits"] / max(1, stats["seen"]), 4),
+    }
+    print(json.dumps(summary))
+
+
+if __name__ == "__main__":
+    main()
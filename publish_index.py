@@ -0,0 +1,77 @@
+"""
+Publish the candidate feature cache and TF-IDF index for web workers to share.
+
+Usage:
+1. python publish_index.py
+- Builds (or reuses) the Arrow feature cache of candidates.parquet
+- Fits (or reuses) both TF-IDF vectorizers and writes their CSR arrays as .npy files
+- Prints the index key and the on-disk size of each published file
+
+2. python publish_index.py --force
+- Rebuilds the feature cache and refits the index even if up-to-date entries exist
+
+3. python publish_index.py --retrieval
+- Also fits the retrieval embedder and publishes its vocabulary and embedding matrix
+  (implied when RETRIEVAL_SHORTLIST > 0)
+
+Run it once before starting gunicorn. Each worker then memory-maps the published
+files (INDEX_MMAP=1, the default) instead of reading the parquet and fitting its own
+copy, so the matrices and numeric columns are held once per host in the page cache.
+"""
+
+import argparse
+import json
+import os
+import time
+
+from src.matcher import SmartMatcher
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--data", default=None, help="parquet file (default: DataLoader's candidates.parquet)")
+    parser.add_argument("--force", action="store_true", help="rebuild the feature cache and refit the index")
+    parser.add_argument("--retrieval", action="store_true", help="also publish the retrieval embeddings")
+    args = parser.parse_args()
+
+    start = time.monotonic()
+    matcher = SmartMatcher()
+    loader = matcher.data_loader
+    if args.data:
+        loader.data_path = os.path.abspath(args.data)
+    if args.retrieval and matcher.retrieval_shortlist <= 0:
+        # Any positive shortlist makes the build embed the corpus; the size itself is not stored
+        matcher.retrieval_shortlist = 1
+    if args.force:
+        loader.build_feature_cache()
+    index = matcher.rebuild_index(reload_data=True, refit=args.force)
+    if index is None:
+        raise SystemExit("Index build failed; see the log above.")
+
+    key = matcher._index_key()
+    entry, files = _entry_files(matcher.index_store, key)
+    report = {
+        "rows": len(index),
+        "fingerprint": index.fingerprint,
+        "index_key": key,
+        "index_dir": entry,
+        "files": files,
+    }
+    if index.embedder is not None and matcher.embedder is None:
+        retrieval_key = matcher._retrieval_key(index.embedder)
+        retrieval_dir, retrieval_files = _entry_files(matcher.index_store, retrieval_key)
+        report.update(retrieval_key=retrieval_key, retrieval_dir=retrieval_dir, retrieval_files=retrieval_files)
+    report["elapsed_sec"] = round(time.monotonic() - start, 2)
+    print(json.dumps(report, indent=2))
+
+
+def _entry_files(index_store, key):
+    entry = os.path.join(index_store.cache_dir, key) if key else None
+    files = {}
+    if entry and os.path.isdir(entry):
+        files = {name: os.path.getsize(os.path.join(entry, name)) for name in sorted(os.listdir(entry))}
+    return entry, files
+
+
+if __name__ == "__main__":
+    main()
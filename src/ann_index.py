@@ -0,0 +1,222 @@
+import threading
+
+import numpy as np
+
+
+def _normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors[None, :]
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def _top_k(sims, k):
+    """Positions of the k largest values in ``sims``, best first."""
+    k = min(int(k), len(sims))
+    if k <= 0:
+        return np.zeros(0, dtype=np.intp)
+    if k < len(sims):
+        part = np.argpartition(-sims, k - 1)[:k]
+    else:
+        part = np.arange(len(sims))
+    return part[np.argsort(-sims[part], kind="stable")]
+
+
+class FlatIndex:
+    """Exact cosine search over a preallocated, L2-normalized float32 matrix.
+
+    Rows are appended in place; capacity doubles when full, so appends are
+    amortized O(1) and queries run on a view of the filled rows (no copy).
+    """
+
+    def __init__(self, dim=None, initial_capacity=1024):
+        self.dim = dim
+        self._capacity = max(1, int(initial_capacity))
+        self._data = None if dim is None else np.zeros((self._capacity, dim), dtype=np.float32)
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def vectors(self):
+        return self._data[: self._size] if self._data is not None else np.zeros((0, self.dim or 0), dtype=np.float32)
+
+    def _reserve(self, extra):
+        needed = self._size + extra
+        if self._data is None:
+            self._capacity = max(self._capacity, needed)
+            self._data = np.zeros((self._capacity, self.dim), dtype=np.float32)
+            return
+        if needed <= self._capacity:
+            return
+        while self._capacity < needed:
+            self._capacity *= 2
+        grown = np.zeros((self._capacity, self.dim), dtype=np.float32)
+        grown[: self._size] = self._data[: self._size]
+        self._data = grown
+
+    def add(self, vectors):
+        """Append vectors; returns the row numbers they were stored at."""
+        vectors = _normalize(vectors)
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+        elif vectors.shape[1] != self.dim:
+            raise ValueError(f"Expected vectors of dimension {self.dim}, got {vectors.shape[1]}")
+        self._reserve(len(vectors))
+        rows = np.arange(self._size, self._size + len(vectors))
+        self._data[rows] = vectors
+        self._size += len(vectors)
+        self._on_add(rows)
+        return rows
+
+    def update(self, row, vector):
+        self._data[row] = _normalize(vector)[0]
+        self._on_update(row)
+
+    def _on_add(self, rows):
+        pass
+
+    def _on_update(self, row):
+        pass
+
+    def search(self, query, k):
+        """Return (rows, similarities) of the k nearest stored vectors."""
+        if self._size == 0:
+            return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.float32)
+        q = _normalize(query)[0]
+        sims = self.vectors @ q
+        top = _top_k(sims, k)
+        return top, sims[top]
+
+
+class IVFIndex(FlatIndex):
+    """Approximate search with an inverted-file (IVF) coarse quantizer.
+
+    Vectors are clustered with spherical k-means into ``nlist`` lists; a query
+    scans the ``nprobe`` lists whose centroids are closest, and further ones
+    until they hold at least ``k`` rows. Higher ``nprobe`` trades speed for
+    recall (``nprobe == nlist`` is exact). The
+    quantizer is trained by the ``add`` that reaches ``min_train_size`` vectors
+    and retrained whenever the index has doubled since; writes hold a lock and
+    publish the lists as new arrays, so ``search`` only reads.
+    """
+
+    def __init__(self, dim=None, initial_capacity=1024, nlist=0, nprobe=8, min_train_size=1024, n_iter=10, seed=0):
+        super().__init__(dim=dim, initial_capacity=initial_capacity)
+        self.nlist = int(nlist)
+        self.nprobe = max(1, int(nprobe))
+        self.min_train_size = int(min_train_size)
+        self.n_iter = int(n_iter)
+        self.seed = seed
+        self._centroids = None
+        self._trained_size = 0
+        self._lists = []
+        self._assign = np.zeros(0, dtype=np.int32)
+        # (centroids, per-list row arrays) as seen by search; replaced, never mutated
+        self._published = None
+        self._lock = threading.RLock()
+
+    @property
+    def is_trained(self):
+        return self._centroids is not None
+
+    def add(self, vectors):
+        with self._lock:
+            return super().add(vectors)
+
+    def update(self, row, vector):
+        with self._lock:
+            super().update(row, vector)
+
+    def train(self):
+        with self._lock:
+            self._train()
+
+    def _train(self):
+        n = self._size
+        nlist = self.nlist or max(1, int(np.sqrt(n)))
+        nlist = min(nlist, n)
+        rng = np.random.default_rng(self.seed)
+        data = self.vectors
+        sample = data[rng.choice(n, size=min(n, 256 * nlist), replace=False)]
+        centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+        for _ in range(self.n_iter):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            for c in range(nlist):
+                members = sample[assign == c]
+                if len(members):
+                    centroids[c] = members.sum(axis=0)
+            centroids = _normalize(centroids)
+        # Built aside and published in one assignment, so searches keep the previous lists until then
+        assign = np.zeros(self._capacity, dtype=np.int32)
+        lists = [[] for _ in range(nlist)]
+        self._label_rows(centroids, np.arange(n), assign, lists)
+        self._centroids, self._assign, self._lists, self._trained_size = centroids, assign, lists, n
+        self._published = (centroids, tuple(np.asarray(rows, dtype=np.intp) for rows in lists))
+
+    def _label_rows(self, centroids, rows, assign, lists, batch=8192):
+        """Assign ``rows`` to their closest centroid in ``assign``/``lists``; returns the labels touched."""
+        touched = set()
+        for start in range(0, len(rows), batch):
+            chunk = rows[start: start + batch]
+            labels = np.argmax(self._data[chunk] @ centroids.T, axis=1)
+            assign[chunk] = labels
+            for row, label in zip(chunk.tolist(), labels.tolist()):
+                lists[label].append(row)
+                touched.add(label)
+        return touched
+
+    def _assign_rows(self, rows, touched=()):
+        if len(self._assign) < self._capacity:
+            grown = np.zeros(self._capacity, dtype=np.int32)
+            grown[: len(self._assign)] = self._assign
+            self._assign = grown
+        touched = set(touched) | self._label_rows(self._centroids, rows, self._assign, self._lists)
+        centroids, arrays = self._published
+        arrays = list(arrays)
+        for label in touched:
+            arrays[label] = np.asarray(self._lists[label], dtype=np.intp)
+        self._published = (centroids, tuple(arrays))
+
+    def _on_add(self, rows):
+        if self._size >= max(1, self.min_train_size) and (not self.is_trained or self._size >= 2 * self._trained_size):
+            self._train()
+        elif self.is_trained:
+            self._assign_rows(rows)
+
+    def _on_update(self, row):
+        if not self.is_trained:
+            return
+        old = int(self._assign[row])
+        self._lists[old].remove(row)
+        self._assign_rows(np.asarray([row]), touched=(old,))
+
+    def search(self, query, k):
+        # Read the published lists before the data: rows are written before they are listed
+        published = self._published
+        if published is None:
+            return super().search(query, k)
+        centroids, arrays = published
+        data = self._data
+        q = _normalize(query)[0]
+        order = _top_k(centroids @ q, len(centroids))
+        # At least nprobe lists, then the next-closest ones until they hold k rows (or run out)
+        filled = np.cumsum([len(arrays[c]) for c in order])
+        probe = order[: max(self.nprobe, int(np.searchsorted(filled, k)) + 1)]
+        rows = np.concatenate([arrays[c] for c in probe])
+        if len(rows) == 0:
+            return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.float32)
+        sims = data[rows] @ q
+        top = _top_k(sims, k)
+        return rows[top], sims[top]
+
+
+def make_index(backend="flat", **kwargs):
+    if backend == "ivf":
+        return IVFIndex(**kwargs)
+    if backend == "flat":
+        return FlatIndex(**{k: v for k, v in kwargs.items() if k in ("dim", "initial_capacity")})
+    raise ValueError(f"Unknown vector index backend: {backend}")
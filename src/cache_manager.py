@@ -1,24 +1,78 @@
 import os
 import json
 import sqlite3
+import threading
 import time
 import pickle
 import hashlib
+from contextlib import contextmanager
+
+from src.metrics import CACHE_REQUESTS_TOTAL
 try:
     import redis
     REDIS_AVAILABLE = True
 except ImportError:
     REDIS_AVAILABLE = False
 
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# LLM responses get their own SQLite file (untracked), apart from parsed_data.db
+LLM_CACHE_DB_PATH = os.getenv("LLM_CACHE_DB_PATH", os.path.join(_PROJECT_ROOT, ".cache", "llm_responses.db"))
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))  # seconds
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "20000"))
+# Candidates added through POST /candidates, replayed on top of the data file at every index build
+INGEST_DB_PATH = os.getenv("INGEST_DB_PATH", os.path.join(_PROJECT_ROOT, ".cache", "ingested_candidates.db"))
+RESUME_CACHE_TTL = 7 * 24 * 3600  # seconds
+# Keep each IN (...) below SQLite's host-parameter limit
+SQLITE_BATCH_SIZE = 500
+
+_SQLITE_SCHEMA = {
+    # Structured resume data
+    "parsed_resumes": [
+        '''CREATE TABLE IF NOT EXISTS parsed_resumes
+           (id TEXT PRIMARY KEY,
+            hash TEXT,
+            parsed_data BLOB,
+            timestamp REAL)''',
+    ],
+    # Generic LLM response cache (JD analysis, candidate fit scores)
+    "llm_responses": [
+        '''CREATE TABLE IF NOT EXISTS llm_responses
+           (key TEXT PRIMARY KEY,
+            response BLOB,
+            created REAL,
+            expires REAL)''',
+        "CREATE INDEX IF NOT EXISTS idx_llm_responses_created ON llm_responses (created)",
+    ],
+    # Raw candidate records received by ingestion (latest version per id)
+    "ingested_candidates": [
+        '''CREATE TABLE IF NOT EXISTS ingested_candidates
+           (id TEXT PRIMARY KEY,
+            record TEXT,
+            updated REAL)''',
+    ],
+}
+
+
 class CacheManager:
-    def __init__(self, db_path="parsed_data.db", redis_host='localhost', redis_port=6379):
+    def __init__(self, db_path="parsed_data.db", redis_host='localhost', redis_port=6379, persistent=None, wal=None,
+                 tables=("parsed_resumes",)):
         self.db_path = db_path
+        self.tables = tuple(tables)
         self.redis_client = None
         self.redis_available = False
-        
+        self.llm_cache_max_entries = LLM_CACHE_MAX_ENTRIES
+        self._llm_writes = 0
+        # Persistent mode keeps one SQLite connection per thread instead of connect/close per call
+        self.persistent = (os.getenv("SQLITE_PERSISTENT", "1") != "0") if persistent is None else bool(persistent)
+        # WAL is opt-in (SQLITE_WAL=1): switching modes rewrites the database header
+        self.wal = (os.getenv("SQLITE_WAL", "0") == "1") if wal is None else bool(wal)
+        self._local = threading.local()
+
         # Initialize SQLite
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
         self._init_sqlite()
-        
+
         # Initialize Redis
         if REDIS_AVAILABLE:
             try:
@@ -28,77 +82,220 @@ class CacheManager:
                 print("Redis connected successfully.")
             except Exception as e:
                 print(f"Redis connection failed: {e}. Using SQLite/File cache only.")
-        
+
+    def _open_sqlite(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        if self.wal:
+            # WAL lets readers proceed while a batch write is committing
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @contextmanager
+    def _connection(self):
+        if not self.persistent:
+            conn = self._open_sqlite()
+            try:
+                yield conn
+            finally:
+                conn.close()
+            return
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._open_sqlite()
+            self._local.conn = conn
+        yield conn
+
+    def close(self):
+        """Close this thread's persistent SQLite connection, if any."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
     def _init_sqlite(self):
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        # Create table for structured resume data
-        c.execute('''CREATE TABLE IF NOT EXISTS parsed_resumes
-                     (id TEXT PRIMARY KEY, 
-                      hash TEXT, 
-                      parsed_data BLOB, 
-                      timestamp REAL)''')
-        conn.commit()
-        conn.close()
+        with self._connection() as conn:
+            c = conn.cursor()
+            for table in self.tables:
+                for statement in _SQLITE_SCHEMA[table]:
+                    c.execute(statement)
+            conn.commit()
 
     def get_cached_resume(self, resume_id, content_hash):
-        # 1. Try Redis (7 days expiry)
+        return self.get_many([(resume_id, content_hash)]).get(resume_id)
+
+    def set_cached_resume(self, resume_id, content_hash, parsed_content):
+        self.set_many([(resume_id, content_hash, parsed_content)])
+
+    def get_many(self, items):
+        """Batch lookup of parsed resumes.
+
+        ``items`` is an iterable of (resume_id, content_hash). Returns
+        {resume_id: content} for entries whose stored hash matches.
+        """
+        wanted = dict(items)
+        found = {}
+        if not wanted:
+            return found
+
+        # 1. Try Redis with a single MGET
         if self.redis_available:
             try:
-                cache_key = f"resume:{resume_id}"
-                cached_data = self.redis_client.get(cache_key)
-                if cached_data:
+                ids = list(wanted)
+                for resume_id, cached_data in zip(ids, self.redis_client.mget([f"resume:{i}" for i in ids])):
+                    if not cached_data:
+                        continue
                     data = pickle.loads(cached_data)
                     # Verify hash
-                    if data.get('hash') == content_hash:
-                        return data.get('content', data)
+                    if data.get('hash') == wanted[resume_id]:
+                        found[resume_id] = data.get('content', data)
             except Exception as e:
                 print(f"Redis get error: {e}")
+            CACHE_REQUESTS_TOTAL.inc(len(found), cache="resume", tier="redis", result="hit")
+            CACHE_REQUESTS_TOTAL.inc(len(wanted) - len(found), cache="resume", tier="redis", result="miss")
 
-        # 2. Try SQLite
+        # 2. Try SQLite for the rest, one IN (...) query per batch
+        missing = [i for i in wanted if i not in found]
+        refresh = {}
         try:
-            conn = sqlite3.connect(self.db_path)
-            c = conn.cursor()
-            c.execute("SELECT hash, parsed_data FROM parsed_resumes WHERE id=?", (resume_id,))
-            row = c.fetchone()
-            conn.close()
-            
-            if row:
-                stored_hash, blob_data = row
-                if stored_hash == content_hash:
-                    data = pickle.loads(blob_data)
-                    content = data.get('content', data) if isinstance(data, dict) else data
-                    # Refresh Redis if available
-                    if self.redis_available:
-                        self.set_cached_resume(resume_id, content_hash, content)
-                    return content
+            with self._connection() as conn:
+                c = conn.cursor()
+                for start in range(0, len(missing), SQLITE_BATCH_SIZE):
+                    batch = missing[start:start + SQLITE_BATCH_SIZE]
+                    placeholders = ",".join("?" * len(batch))
+                    c.execute(f"SELECT id, hash, parsed_data FROM parsed_resumes WHERE id IN ({placeholders})", batch)
+                    for resume_id, stored_hash, blob_data in c.fetchall():
+                        if stored_hash != wanted.get(resume_id):
+                            continue
+                        data = pickle.loads(blob_data)
+                        content = data.get('content', data) if isinstance(data, dict) else data
+                        found[resume_id] = content
+                        refresh[resume_id] = blob_data
         except Exception as e:
             print(f"SQLite get error: {e}")
-            
+        CACHE_REQUESTS_TOTAL.inc(len(refresh), cache="resume", tier="sqlite", result="hit")
+        CACHE_REQUESTS_TOTAL.inc(len(missing) - len(refresh), cache="resume", tier="sqlite", result="miss")
+
+        # Refresh Redis only (the rows are already in SQLite)
+        if refresh and self.redis_available:
+            try:
+                pipe = self.redis_client.pipeline(transaction=False)
+                for resume_id, blob_data in refresh.items():
+                    pipe.setex(f"resume:{resume_id}", RESUME_CACHE_TTL, blob_data)
+                pipe.execute()
+            except Exception as e:
+                print(f"Redis set error: {e}")
+
+        return found
+
+    def set_many(self, items):
+        """Batch store of parsed resumes: iterable of (resume_id, content_hash, parsed_content)."""
+        now = time.time()
+        rows = [
+            (resume_id, content_hash, pickle.dumps({"hash": content_hash, "content": parsed_content}), now)
+            for resume_id, content_hash, parsed_content in items
+        ]
+        if not rows:
+            return
+
+        # 1. Save to Redis in one pipelined round-trip
+        if self.redis_available:
+            try:
+                pipe = self.redis_client.pipeline(transaction=False)
+                for resume_id, _, serialized_content, _ in rows:
+                    pipe.setex(f"resume:{resume_id}", RESUME_CACHE_TTL, serialized_content)
+                pipe.execute()
+            except Exception as e:
+                print(f"Redis set error: {e}")
+
+        # 2. Save to SQLite in a single transaction
+        try:
+            with self._connection() as conn:
+                with conn:
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO parsed_resumes (id, hash, parsed_data, timestamp) VALUES (?, ?, ?, ?)",
+                        rows,
+                    )
+        except Exception as e:
+            print(f"SQLite set error: {e}")
+
+    def get_cached_response(self, key):
+        """Look up a cached LLM response by content key (Redis first, then SQLite)."""
+        if self.redis_available:
+            try:
+                cached_data = self.redis_client.get(f"llm:{key}")
+                if cached_data:
+                    CACHE_REQUESTS_TOTAL.inc(cache="llm", tier="redis", result="hit")
+                    return pickle.loads(cached_data)
+            except Exception as e:
+                print(f"Redis get error: {e}")
+            CACHE_REQUESTS_TOTAL.inc(cache="llm", tier="redis", result="miss")
+
+        try:
+            with self._connection() as conn:
+                c = conn.cursor()
+                c.execute("SELECT response, expires FROM llm_responses WHERE key=?", (key,))
+                row = c.fetchone()
+
+            if row and row[1] > time.time():
+                CACHE_REQUESTS_TOTAL.inc(cache="llm", tier="sqlite", result="hit")
+                # Refresh Redis with the remaining lifetime only
+                if self.redis_available:
+                    try:
+                        self.redis_client.setex(f"llm:{key}", max(1, int(row[1] - time.time())), row[0])
+                    except Exception as e:
+                        print(f"Redis set error: {e}")
+                return pickle.loads(row[0])
+        except Exception as e:
+            print(f"SQLite get error: {e}")
+
+        CACHE_REQUESTS_TOTAL.inc(cache="llm", tier="sqlite", result="miss")
         return None
 
-    def set_cached_resume(self, resume_id, content_hash, parsed_content):
-        serialized_content = pickle.dumps({"hash": content_hash, "content": parsed_content})
-        
-        # 1. Save to Redis
+    def set_cached_response(self, key, response, ttl=None):
+        ttl = int(ttl or LLM_CACHE_TTL)
+        serialized = pickle.dumps(response)
+
         if self.redis_available:
             try:
-                cache_key = f"resume:{resume_id}"
-                self.redis_client.setex(cache_key, 7 * 24 * 3600, serialized_content)
+                self.redis_client.setex(f"llm:{key}", ttl, serialized)
             except Exception as e:
                 print(f"Redis set error: {e}")
-        
-        # 2. Save to SQLite
+
         try:
-            conn = sqlite3.connect(self.db_path)
-            c = conn.cursor()
-            c.execute("INSERT OR REPLACE INTO parsed_resumes (id, hash, parsed_data, timestamp) VALUES (?, ?, ?, ?)",
-                      (resume_id, content_hash, serialized_content, time.time()))
-            conn.commit()
-            conn.close()
+            now = time.time()
+            with self._connection() as conn:
+                with conn:
+                    conn.execute("INSERT OR REPLACE INTO llm_responses (key, response, created, expires) VALUES (?, ?, ?, ?)",
+                                 (key, serialized, now, now + ttl))
+                    self._llm_writes += 1
+                    # Amortize eviction: drop expired rows and trim to the size bound every 100 writes
+                    if self._llm_writes % 100 == 1:
+                        conn.execute("DELETE FROM llm_responses WHERE expires <= ?", (now,))
+                        conn.execute("DELETE FROM llm_responses WHERE key IN "
+                                     "(SELECT key FROM llm_responses ORDER BY created DESC LIMIT -1 OFFSET ?)",
+                                     (self.llm_cache_max_entries,))
         except Exception as e:
             print(f"SQLite set error: {e}")
 
+    def save_ingested(self, records):
+        """Store raw ingested candidate records (JSON), replacing earlier versions of the same id."""
+        now = time.time()
+        rows = [(str(r["id"]), json.dumps(r, default=str), now) for r in records]
+        if not rows:
+            return
+        with self._connection() as conn:
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO ingested_candidates (id, record, updated) VALUES (?, ?, ?)", rows)
+
+    def load_ingested(self):
+        """All stored ingested records, oldest first."""
+        with self._connection() as conn:
+            c = conn.cursor()
+            c.execute("SELECT record FROM ingested_candidates ORDER BY updated, rowid")
+            return [json.loads(row[0]) for row in c.fetchall()]
+
     @staticmethod
     def compute_hash(text):
         return hashlib.md5(text.encode('utf-8')).hexdigest()
@@ -0,0 +1,77 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+def _frozen(arr):
+    """Read-only view of ``arr`` so a published snapshot cannot be changed in place."""
+    view = np.asarray(arr).view()
+    view.flags.writeable = False
+    return view
+
+
+class CandidateIndex:
+    """Immutable snapshot of everything Stage-1 reads; replaced as a whole, never modified."""
+
+    def __init__(self, candidates, vectorizer, skill_vectorizer, text_matrix, skill_matrix,
+                 lf_matrix, lf_vocab, exp_years, english_rank, position_rows,
+                 skill_index=None, embedder=None, vector_store=None, fingerprint=None,
+                 role_view_cache_size=64, fit_token=None, ingested=(), vector_rows=None):
+        self.candidates = candidates
+        self.vectorizer = vectorizer
+        self.skill_vectorizer = skill_vectorizer
+        self.text_matrix = text_matrix
+        self.skill_matrix = skill_matrix
+        # Binary rows x tokens CSR of the Looking For tokens, and token -> column
+        self.lf_matrix = lf_matrix
+        self.lf_vocab = lf_vocab
+        self.exp_years = _frozen(exp_years)
+        self.english_rank = _frozen(english_rank)
+        self.position_rows = {pos: _frozen(rows) for pos, rows in position_rows.items()}
+        self.skill_index = skill_index
+        self.embedder = embedder
+        self.vector_store = vector_store
+        # Vector store position -> row (-1 once superseded). The store is shared and
+        # append-only; this snapshot only reads its first len(vector_rows) entries.
+        if vector_rows is None:
+            vector_rows = np.arange(len(candidates) if vector_store is not None else 0, dtype=np.intp)
+        self.vector_rows = _frozen(vector_rows)
+        self.fingerprint = fingerprint
+        self.role_view_cache_size = role_view_cache_size
+        # The fit the vectorizers came from, and the batches ingested since (replayed by a refit)
+        self.fit_token = fit_token if fit_token is not None else object()
+        self.ingested = tuple(ingested)
+        self.id_rows = {str(cid): row for row, cid in enumerate(candidates.column("id")) if cid is not None}
+        self._role_views = OrderedDict()
+        self._role_lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.candidates)
+
+    @property
+    def pending_rows(self):
+        """Candidates ingested since the vectorizers were last fitted."""
+        return sum(len(batch) for batch in self.ingested)
+
+    def role_rows(self, position_filter):
+        """Sorted row indices whose Position contains ``position_filter`` (None = all rows).
+
+        Substring semantics match ``DataLoader.load_candidates``; the scan runs over
+        distinct Position values only, and recent results are kept in a small LRU.
+        """
+        if not position_filter:
+            return None
+        pf = position_filter.lower()
+        with self._role_lock:
+            rows = self._role_views.get(pf)
+            if rows is not None:
+                self._role_views.move_to_end(pf)
+                return rows
+        parts = [r for pos, r in self.position_rows.items() if pf in pos]
+        rows = _frozen(np.sort(np.concatenate(parts)) if parts else np.zeros(0, dtype=np.intp))
+        with self._role_lock:
+            self._role_views[pf] = rows
+            if len(self._role_views) > self.role_view_cache_size:
+                self._role_views.popitem(last=False)
+        return rows
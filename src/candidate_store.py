@@ -0,0 +1,395 @@
+from bisect import bisect_right
+from collections.abc import Mapping, Sequence
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from src.llm_service import LLMService
+
+# Low-cardinality fields kept as interned categories plus per-row codes (-1 = absent).
+CATEGORICAL_FIELDS = ("Position", "English Level")
+# Never stored; rebuilt from the stored fields whenever a row is read.
+DERIVED_FIELDS = ("Long Description", "looking_for_text")
+
+# Joins the skill_hints list into one stored text value (hints are stripped, so never edge on it).
+SKILL_HINT_SEP = "\x1f"
+
+
+def _to_str(v):
+    if v is None:
+        return ""
+    if isinstance(v, str):
+        return v
+    return str(v)
+
+
+def describe_candidate(cand):
+    """Lightweight textual summary for ranking/LLM prompts."""
+    parts = []
+    position = _to_str(cand.get("Position", "")).strip()
+    primary_keyword = _to_str(cand.get("Primary Keyword", "")).strip()
+    english_level = LLMService.normalize_english_level(cand.get("English Level", "")) or _to_str(cand.get("English Level", "")).strip()
+    exp_years = cand.get("Experience Years", "")
+    looking_for = _to_str(cand.get("Looking For", "")).strip()
+    highlights = _to_str(cand.get("Highlights", "")).strip()
+    moreinfo = _to_str(cand.get("Moreinfo", "")).strip()
+    cv = _to_str(cand.get("CV", "")).strip()
+
+    if position:
+        parts.append(f"Position: {position}")
+    if primary_keyword:
+        parts.append(f"Primary Keyword: {primary_keyword}")
+    if english_level:
+        parts.append(f"English Level: {english_level}")
+    if exp_years != "" and exp_years is not None:
+        parts.append(f"Experience Years: {exp_years}")
+    if looking_for:
+        parts.append(f"Looking For: {looking_for}")
+    if highlights:
+        parts.append(f"Highlights: {highlights}")
+    if moreinfo:
+        parts.append(f"Moreinfo: {moreinfo}")
+    if cv:
+        parts.append(f"CV: {cv}")
+
+    return "\n".join(parts).strip()
+
+
+class CandidateRow(Mapping):
+    """Read-only dict view of one ``CandidateStore`` row; values are decoded on access."""
+
+    __slots__ = ("_store", "_row")
+
+    def __init__(self, store, row):
+        self._store = store
+        self._row = row
+
+    def __getitem__(self, key):
+        return self._store.value(self._row, key)
+
+    def __iter__(self):
+        return iter(self._store.row_keys(self._row))
+
+    def __len__(self):
+        return len(self._store.row_keys(self._row))
+
+    def __repr__(self):
+        return f"CandidateRow({self._row}, id={self.get('id')!r})"
+
+
+class CandidateStore(Sequence):
+    """Immutable columnar candidate table whose rows read like the loader's candidate dicts."""
+
+    def __init__(self, fields, segments, bases, starts, ends, categories, codes, exp_years, english_rank,
+                 dead_bytes=0):
+        self.fields = tuple(fields)
+        self._field_pos = {name: j for j, name in enumerate(self.fields)}
+        # Text segments and the offset each one starts at in the spans' address space
+        self._segments = tuple(segments)
+        self._bases = list(bases)
+        self._size = self._bases[-1] + len(self._segments[-1]) if self._segments else 0
+        # (rows, fields) [start, end) spans of each text cell; start -1 = the row lacks the field
+        self._starts = starts
+        self._ends = ends
+        self.categories = {name: tuple(values) for name, values in categories.items()}
+        self.codes = codes
+        self.exp_years = exp_years
+        self.english_rank = english_rank
+        # Text bytes of rows that were replaced since the store was built
+        self.dead_bytes = dead_bytes
+        for arr in (self._starts, self._ends, self.exp_years, self.english_rank, *self.codes.values()):
+            arr.flags.writeable = False
+
+    @classmethod
+    def from_records(cls, records, exp_years, english_rank):
+        """Encode candidate dicts; ``exp_years``/``english_rank`` are the parsed numeric columns."""
+        records = list(records)
+        names = []
+        for rec in records:
+            for key in rec:
+                if key not in names and key not in DERIVED_FIELDS:
+                    names.append(key)
+        columns = {name: [rec.get(name) for rec in records] for name in names}
+        return cls.from_columns(columns, exp_years, english_rank, len(records))
+
+    @classmethod
+    def from_columns(cls, columns, exp_years, english_rank, n_rows=None):
+        """Encode ``{field: values}``; ``None`` marks a field the row does not have."""
+        if n_rows is None:
+            n_rows = len(next(iter(columns.values()))) if columns else 0
+        builder = _Builder(n_rows)
+        for name, values in columns.items():
+            if name in DERIVED_FIELDS:
+                continue
+            if name in CATEGORICAL_FIELDS:
+                builder.add_categorical(name, values)
+            elif name == "skill_hints":
+                builder.add_text(name, [None if v is None else SKILL_HINT_SEP.join(v) for v in values])
+            else:
+                builder.add_text(name, values)
+        return builder.build(exp_years, english_rank)
+
+    @classmethod
+    def from_table(cls, table, exp_column="_exp_years", rank_column="_english_rank"):
+        """Encode a DataLoader feature table (Arrow); its numeric columns become the numeric arrays.
+
+        String columns and the numeric columns are used in place, so a memory-mapped
+        table stays the backing memory of the store.
+        """
+        builder = _Builder(table.num_rows)
+        for name in table.column_names:
+            if name in (exp_column, rank_column) or name in DERIVED_FIELDS:
+                continue
+            column = table.column(name)
+            if name in CATEGORICAL_FIELDS:
+                arr = column.combine_chunks()
+                if _is_string(arr.type):
+                    encoded = arr.dictionary_encode()
+                    builder.add_codes(name, encoded.indices.fill_null(-1).to_numpy(), encoded.dictionary.to_pylist())
+                else:
+                    builder.add_categorical(name, arr.to_pylist())
+            elif name == "skill_hints" and pa.types.is_list(column.type):
+                builder.add_arrow_text(name, [pc.binary_join(chunk, SKILL_HINT_SEP) for chunk in column.chunks])
+            elif _is_string(column.type):
+                builder.add_arrow_text(name, column.chunks)
+            else:
+                builder.add_text(name, column.to_pylist())
+        return builder.build(_numeric(table.column(exp_column)), _numeric(table.column(rank_column)))
+
+    @classmethod
+    def empty(cls):
+        return cls.from_records([], np.zeros(0), np.zeros(0))
+
+    def __len__(self):
+        return len(self.exp_years)
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [CandidateRow(self, i) for i in range(*row.indices(len(self)))]
+        row = int(row)
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError("candidate row out of range")
+        return CandidateRow(self, row)
+
+    @property
+    def nbytes(self):
+        """Approximate memory held by the columns."""
+        arrays = (self._starts, self._ends, self.exp_years, self.english_rank, *self.codes.values())
+        return self._size + sum(a.nbytes for a in arrays)
+
+    def row_keys(self, row):
+        keys = [name for j, name in enumerate(self.fields) if self._starts[row, j] >= 0]
+        keys += [name for name, codes in self.codes.items() if codes[row] >= 0]
+        return keys + list(DERIVED_FIELDS)
+
+    def value(self, row, name):
+        """Value of ``name`` in ``row``; raises KeyError when the row does not have it."""
+        j = self._field_pos.get(name)
+        if j is not None:
+            start = self._starts[row, j]
+            if start < 0:
+                raise KeyError(name)
+            k = bisect_right(self._bases, start) - 1
+            base = self._bases[k]
+            text = str(self._segments[k][start - base:self._ends[row, j] - base], "utf-8")
+            if name == "skill_hints":
+                return text.split(SKILL_HINT_SEP) if text else []
+            return text
+        codes = self.codes.get(name)
+        if codes is not None:
+            code = codes[row]
+            if code < 0:
+                raise KeyError(name)
+            return self.categories[name][code]
+        if name == "Long Description":
+            return describe_candidate(CandidateRow(self, row))
+        if name == "looking_for_text":
+            return _to_str(CandidateRow(self, row).get("Looking For", "")).strip()
+        raise KeyError(name)
+
+    def column(self, name, default=None):
+        """Values of one field for every row (``default`` where a row lacks it)."""
+        j = self._field_pos.get(name)
+        if j is not None:
+            starts = self._starts[:, j]
+            segs, bases = self._segments, self._bases
+            ks = (np.searchsorted(bases, starts, side="right") - 1).tolist() if segs else [0] * len(starts)
+            values = [str(segs[k][s - bases[k]:e - bases[k]], "utf-8") if s >= 0 else default
+                      for k, s, e in zip(ks, starts.tolist(), self._ends[:, j].tolist())]
+            if name == "skill_hints":
+                values = [v if v is default else v.split(SKILL_HINT_SEP) if v else [] for v in values]
+            return values
+        codes = self.codes.get(name)
+        if codes is not None:
+            cats = self.categories[name]
+            return [cats[c] if c >= 0 else default for c in codes.tolist()]
+        if name in DERIVED_FIELDS:
+            return [self.value(i, name) for i in range(len(self))]
+        return [default] * len(self)
+
+    def category_rows(self, name):
+        """``{value: sorted rows}`` of a categorical field; rows lacking it are keyed by None."""
+        codes = self.codes.get(name)
+        if codes is None:
+            return {None: np.arange(len(self), dtype=np.intp)} if len(self) else {}
+        order = np.argsort(codes, kind="stable").astype(np.intp)
+        bounds = np.flatnonzero(np.diff(codes[order])) + 1
+        groups = {}
+        for chunk in (np.split(order, bounds) if len(order) else []):
+            code = codes[chunk[0]]
+            groups[self.categories[name][code] if code >= 0 else None] = chunk
+        return groups
+
+    def with_rows(self, rows, records, exp_years, english_rank):
+        """Copy with ``records`` written at ``rows`` (rows >= len(self) must follow on from it).
+
+        The new rows are encoded on their own and appended as new segments; the
+        bytes of replaced rows stay behind until ``compacted``.
+        """
+        rows = np.asarray(rows, dtype=np.intp)
+        added = self.from_records(records, exp_years, english_rank)
+        n_old = len(self)
+        n_new = max(n_old, int(rows.max()) + 1) if len(rows) else n_old
+
+        fields = list(self.fields) + [f for f in added.fields if f not in self._field_pos]
+        starts = np.full((n_new, len(fields)), -1, dtype=np.int64)
+        ends = np.full((n_new, len(fields)), -1, dtype=np.int64)
+        starts[:n_old, :len(self.fields)] = self._starts
+        ends[:n_old, :len(self.fields)] = self._ends
+        base = self._size
+        for j, name in enumerate(fields):
+            k = added._field_pos.get(name)
+            if k is None:
+                starts[rows, j] = ends[rows, j] = -1
+            else:
+                lacking = added._starts[:, k] < 0
+                starts[rows, j] = np.where(lacking, -1, added._starts[:, k] + base)
+                ends[rows, j] = np.where(lacking, -1, added._ends[:, k] + base)
+
+        categories, codes = {}, {}
+        for name in list(self.codes) + [f for f in added.codes if f not in self.codes]:
+            lookup = {v: i for i, v in enumerate(self.categories.get(name, ()))}
+            merged = np.full(n_new, -1, dtype=np.int32)
+            if name in self.codes:
+                merged[:n_old] = self.codes[name]
+            merged[rows] = -1
+            if name in added.codes:
+                remap = np.asarray([lookup.setdefault(v, len(lookup)) for v in added.categories[name]] + [-1], dtype=np.int32)
+                merged[rows] = remap[added.codes[name]]  # code -1 picks the trailing -1
+            categories[name] = tuple(lookup)
+            codes[name] = merged
+
+        replaced = rows[rows < n_old]
+        old_spans = np.where(self._starts[replaced] >= 0, self._ends[replaced] - self._starts[replaced], 0)
+        return CandidateStore(
+            fields, self._segments + added._segments, self._bases + [b + base for b in added._bases],
+            starts, ends, categories, codes,
+            self._merged_numeric(self.exp_years, rows, added.exp_years, n_new),
+            self._merged_numeric(self.english_rank, rows, added.english_rank, n_new),
+            dead_bytes=self.dead_bytes + int(old_spans.sum()),
+        )
+
+    @staticmethod
+    def _merged_numeric(old, rows, new, n_new):
+        merged = np.zeros(n_new, dtype=old.dtype)
+        merged[:len(old)] = old
+        merged[rows] = new
+        return merged
+
+    def compacted(self):
+        """Copy without the text bytes left behind by replaced rows (``self`` if there are none)."""
+        if not self.dead_bytes:
+            return self
+        columns = {name: self.column(name) for name in [*self.fields, *self.codes]}
+        return self.from_columns(columns, self.exp_years, self.english_rank, len(self))
+
+
+def _is_string(arrow_type):
+    return pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type)
+
+
+def _numeric(column):
+    """NumPy view of a numeric Arrow column (zero-copy when it is a single chunk without nulls)."""
+    if column.num_chunks == 1:
+        return column.chunk(0).to_numpy(zero_copy_only=False)
+    return column.to_numpy()
+
+
+class _Builder:
+    """Accumulates the columns of one CandidateStore, text column by text column."""
+
+    def __init__(self, n_rows):
+        self.n_rows = n_rows
+        self.fields, self.starts, self.ends = [], [], []
+        self.segments, self.bases = [], []
+        self.size = 0
+        self.categories, self.codes = {}, {}
+
+    def _add_segment(self, data):
+        """Keep ``data`` as backing memory (not copied); returns the offset its spans are shifted by."""
+        base = self.size
+        if len(data):
+            self.segments.append(data)
+            self.bases.append(base)
+            self.size += len(data)
+        return base
+
+    def _add_field(self, name, starts, ends):
+        self.fields.append(name)
+        self.starts.append(starts)
+        self.ends.append(np.where(starts >= 0, ends, -1))
+
+    def add_text(self, name, values):
+        encoded = [None if v is None else _to_str(v).encode("utf-8") for v in values]
+        lengths = np.fromiter((0 if b is None else len(b) for b in encoded), dtype=np.int64, count=self.n_rows)
+        ends = np.cumsum(lengths)
+        starts = ends - lengths
+        base = self._add_segment(b"".join(b for b in encoded if b is not None))
+        starts += base
+        ends += base
+        starts[[b is None for b in encoded]] = -1
+        self._add_field(name, starts, ends)
+
+    def add_arrow_text(self, name, chunks):
+        """Text column from Arrow string arrays; their data buffers become segments as they are."""
+        starts, ends = [], []
+        for arr in chunks:
+            width = np.int64 if pa.types.is_large_string(arr.type) else np.int32
+            _, offsets, data = arr.buffers()
+            offsets = np.frombuffer(offsets, dtype=width)[arr.offset:arr.offset + len(arr) + 1].astype(np.int64)
+            first = int(offsets[0]) if len(offsets) else 0
+            payload = memoryview(data)[first:int(offsets[-1])] if data is not None and len(offsets) else b""
+            shift = self._add_segment(payload) - first
+            chunk_starts = offsets[:-1] + shift
+            if arr.null_count:
+                chunk_starts[arr.is_null().to_numpy(zero_copy_only=False)] = -1
+            starts.append(chunk_starts)
+            ends.append(offsets[1:] + shift)
+        if not starts:
+            starts, ends = [np.zeros(0, dtype=np.int64)], [np.zeros(0, dtype=np.int64)]
+        self._add_field(name, np.concatenate(starts), np.concatenate(ends))
+
+    def add_categorical(self, name, values):
+        lookup = {}
+        codes = np.fromiter(
+            (-1 if v is None else lookup.setdefault(_to_str(v), len(lookup)) for v in values),
+            dtype=np.int32, count=self.n_rows,
+        )
+        self.add_codes(name, codes, list(lookup))
+
+    def add_codes(self, name, codes, categories):
+        self.codes[name] = np.asarray(codes, dtype=np.int32)
+        self.categories[name] = categories
+
+    def build(self, exp_years, english_rank):
+        shape = (self.n_rows, len(self.fields))
+        starts = np.stack(self.starts, axis=1) if self.fields else np.zeros(shape, dtype=np.int64)
+        ends = np.stack(self.ends, axis=1) if self.fields else np.zeros(shape, dtype=np.int64)
+        # Views: freezing them must not freeze the caller's arrays
+        return CandidateStore(
+            self.fields, self.segments, self.bases, starts, ends, self.categories, self.codes,
+            np.asarray(exp_years, dtype=np.float64).view(), np.asarray(english_rank, dtype=np.int8).view(),
+        )
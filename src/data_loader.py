@@ -1,23 +1,52 @@
+import hashlib
 import os
 import sys
-import pandas as pd
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
 
 _PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if _PROJECT_ROOT not in sys.path:
     sys.path.insert(0, _PROJECT_ROOT)
 
-from src.cache_manager import CacheManager
+from src.cache_manager import INGEST_DB_PATH, CacheManager
+from src.candidate_store import SKILL_HINT_SEP, CandidateStore, describe_candidate
+from src.feature_store import FEATURE_STORE_VERSION, FeatureStore
 from src.llm_service import LLMService
+from src.metrics import LOAD_PHASE_SECONDS
+from src.skill_index import SkillIndex
+
+# Precomputed numeric columns kept next to the candidate dicts (not inside them).
+_NUMERIC_COLUMNS = ("_exp_years", "_english_rank")
+
+# Source columns read from the parquet; anything else in the file is never loaded.
+_SOURCE_COLUMNS = (
+    "id", "Name", "Position", "Primary Keyword", "English Level", "Experience Years", "Exp Years",
+    "Looking For", "Highlights", "Moreinfo", "CV",
+)
+
+# Derived columns get a fixed type so batches always concatenate. Long Description and
+# looking_for_text are not stored; CandidateStore rebuilds them when a row is read.
+# skill_hints is stored joined as CandidateStore keeps it, so a mapped cache is used as is.
+_DERIVED_TYPES = {
+    "skill_hints": pa.string(),
+}
 
 class DataLoader:
     def __init__(self, data_path="candidates.parquet"):
         if isinstance(data_path, str) and not os.path.isabs(data_path):
             data_path = os.path.join(_PROJECT_ROOT, data_path)
         self.data_path = data_path
-        self.cache = CacheManager(db_path=os.path.join(_PROJECT_ROOT, "parsed_data.db"))
+        self.cache = CacheManager(db_path=os.getenv("PARSED_DB_PATH", os.path.join(_PROJECT_ROOT, "parsed_data.db")))
+        self.ingest_store = CacheManager(db_path=INGEST_DB_PATH, tables=("ingested_candidates",))
         self.llm = LLMService()
         self.max_candidates = int(os.getenv("MAX_CANDIDATES", "50000"))
-        self._all_candidates = None  # cached in-memory dataset
+        self.load_batch_rows = max(1, int(os.getenv("LOAD_BATCH_ROWS", "8192")))
+        self._all_candidates = None  # cached in-memory CandidateStore
+        self.use_feature_cache = os.getenv("FEATURE_CACHE", "1") != "0"
+        self.feature_store = FeatureStore()
+        self.dataset_fingerprint = None
+        self._skill_index = None
 
     def _to_str(self, v):
         if v is None:
@@ -28,34 +57,7 @@ class DataLoader:
 
     def _build_long_description(self, cand):
         """Lightweight textual summary for ranking/LLM prompts."""
-        parts = []
-        position = self._to_str(cand.get("Position", "")).strip()
-        primary_keyword = self._to_str(cand.get("Primary Keyword", "")).strip()
-        english_level = LLMService.normalize_english_level(cand.get("English Level", "")) or self._to_str(cand.get("English Level", "")).strip()
-        exp_years = cand.get("Experience Years", "")
-        looking_for = self._to_str(cand.get("Looking For", "")).strip()
-        highlights = self._to_str(cand.get("Highlights", "")).strip()
-        moreinfo = self._to_str(cand.get("Moreinfo", "")).strip()
-        cv = self._to_str(cand.get("CV", "")).strip()
-
-        if position:
-            parts.append(f"Position: {position}")
-        if primary_keyword:
-            parts.append(f"Primary Keyword: {primary_keyword}")
-        if english_level:
-            parts.append(f"English Level: {english_level}")
-        if exp_years != "" and exp_years is not None:
-            parts.append(f"Experience Years: {exp_years}")
-        if looking_for:
-            parts.append(f"Looking For: {looking_for}")
-        if highlights:
-            parts.append(f"Highlights: {highlights}")
-        if moreinfo:
-            parts.append(f"Moreinfo: {moreinfo}")
-        if cv:
-            parts.append(f"CV: {cv}")
-
-        return "\n".join(parts).strip()
+        return describe_candidate(cand)
 
     def _extract_candidate_skills(self, cand):
         """Extract raw skill hints from multiple fields (no LLM)."""
@@ -75,6 +77,13 @@ class DataLoader:
                     tokens.append(t)
         return tokens
 
+    @staticmethod
+    def parse_experience_years(value, default=0.0):
+        try:
+            return float(str(value).replace('y', '').strip())
+        except Exception:
+            return default
+
     def _normalize_structured(self, structured_data, cand):
         """Kept for compatibility; now we mostly rely on raw fields for Stage-1 scoring."""
         if not isinstance(structured_data, dict):
@@ -82,43 +91,190 @@ class DataLoader:
         return structured_data
 
     def _ensure_loaded(self):
-        """Load and preprocess the full dataset once into memory."""
+        """Load the preprocessed dataset once into memory (feature cache first)."""
         if self._all_candidates is not None:
             return
         if not os.path.exists(self.data_path):
             print(f"Data file not found at {self.data_path}")
-            self._all_candidates = []
+            self._all_candidates = CandidateStore.empty()
+            self.dataset_fingerprint = None
             return
+        if self.use_feature_cache:
+            try:
+                if self._load_feature_cache():
+                    return
+            except Exception as e:
+                # An unreadable cache entry is a miss: rebuild from the data file below
+                print(f"Feature cache read failed, rebuilding: {e}")
         try:
-            df = pd.read_parquet(self.data_path)
-            df = df.fillna("")
-            df = df.head(self.max_candidates)
-            raw_candidates = df.to_dict('records')
-            processed_candidates = []
-            print(f"Loading and processing {len(raw_candidates)} candidates into memory (no per-candidate LLM)...")
-            for cand in raw_candidates:
-                cand["English Level"] = LLMService.normalize_english_level(cand.get("English Level", "")) or "basic"
-                cand["Long Description"] = self._build_long_description(cand)
-                cand["skill_hints"] = self._extract_candidate_skills(cand)
-                cand["looking_for_text"] = self._to_str(cand.get("Looking For", "")).strip()
-                processed_candidates.append(cand)
-            self._all_candidates = processed_candidates
+            with LOAD_PHASE_SECONDS.time(phase="parquet_build"):
+                table = self.build_feature_table()
+            self._set_table(table, save=self.use_feature_cache)
         except Exception as e:
             print(f"Error loading data: {e}")
-            self._all_candidates = []
+            self._all_candidates = CandidateStore.empty()
+
+    def _derive_fields(self, cand):
+        """Derived fields persisted in the feature cache."""
+        cand["English Level"] = LLMService.normalize_english_level(cand.get("English Level", "")) or "basic"
+        cand["skill_hints"] = self._extract_candidate_skills(cand)
+        return cand
+
+    @staticmethod
+    def _fill_missing(raw):
+        return {k: "" if v is None or (isinstance(v, float) and v != v) else v for k, v in raw.items()}
+
+    def prepare_candidate(self, raw):
+        """Derive the Stage-1 fields of one raw candidate record, as the parquet load does."""
+        cand = self._derive_fields(self._fill_missing(raw))
+        cand["Long Description"] = self._build_long_description(cand)
+        cand["looking_for_text"] = self._to_str(cand.get("Looking For", "")).strip()
+        return cand
+
+    def save_ingested(self, raw_records):
+        """Persist raw ingested records so later index builds (rebuild, restart) keep them."""
+        self.ingest_store.save_ingested(raw_records)
+
+    def load_ingested(self):
+        """Prepared candidates ingested so far, oldest first; they are not part of the data file."""
+        try:
+            records = self.ingest_store.load_ingested()
+        except Exception as e:
+            print(f"Reading ingested candidates failed: {e}")
+            return []
+        return [self.prepare_candidate(raw) for raw in records]
+
+    def build_feature_table(self):
+        """Stream the parquet and derive Stage-1 fields batch by batch (the slow path).
+
+        Only ``_SOURCE_COLUMNS`` are read, and reading stops once ``max_candidates``
+        rows are in, so peak memory is the output table plus one batch of dicts.
+        """
+        source = pq.ParquetFile(self.data_path)
+        columns = [c for c in source.schema_arrow.names if c in _SOURCE_COLUMNS]
+        if not columns:
+            columns = list(source.schema_arrow.names)
+        total = min(source.metadata.num_rows, max(0, self.max_candidates))
+        print(f"Loading and processing {total} candidates into memory (no per-candidate LLM)...")
+
+        chunks = {}
+        remaining = total
+        for batch in source.iter_batches(batch_size=self.load_batch_rows, columns=columns):
+            if remaining <= 0:
+                break
+            if batch.num_rows == 0:
+                continue
+            if batch.num_rows > remaining:
+                batch = batch.slice(0, remaining)
+            remaining -= batch.num_rows
+            for name, array in self._feature_batch(batch.to_pylist()).items():
+                chunks.setdefault(name, []).append(array)
+
+        if not chunks:
+            arrays = [pa.array([], type=pa.string()) for _ in columns]
+            arrays += [pa.array([], type=pa.float64()), pa.array([], type=pa.int8())]
+            return pa.Table.from_arrays(arrays, names=[*columns, *_NUMERIC_COLUMNS])
+        ordered = [c for c in chunks if c not in _NUMERIC_COLUMNS] + list(_NUMERIC_COLUMNS)
+        return pa.Table.from_arrays([FeatureStore.concat_chunks(chunks[c]) for c in ordered], names=ordered)
+
+    def _feature_batch(self, raw_rows):
+        """Arrow arrays (raw, derived and numeric columns) for one batch of parquet rows."""
+        batch = [self._derive_fields(self._fill_missing(raw)) for raw in raw_rows]
+        arrays = {}
+        for col in batch[0]:
+            values = [c.get(col) for c in batch]
+            if col == "skill_hints":
+                values = [SKILL_HINT_SEP.join(v or []) for v in values]
+            if col in _DERIVED_TYPES:
+                arrays[col] = pa.array(values, type=_DERIVED_TYPES[col])
+            else:
+                arrays[col] = FeatureStore.column_array(values)
+        arrays["_exp_years"] = pa.array(
+            [self.parse_experience_years(c.get('Experience Years', c.get('Exp Years', 0)), 0.0) for c in batch],
+            type=pa.float64(),
+        )
+        arrays["_english_rank"] = pa.array(
+            [LLMService.english_level_rank(c.get("English Level")) for c in batch],
+            type=pa.int8(),
+        )
+        return arrays
+
+    def _load_feature_cache(self):
+        with LOAD_PHASE_SECONDS.time(phase="feature_cache_read"):
+            cached = self.feature_store.load(self.data_path, self.max_candidates)
+        if cached is None:
+            return False
+        table, meta = cached
+        print(f"Loaded {table.num_rows} preprocessed candidates from feature cache ({meta.get('sha256', '')[:12]}).")
+        self._set_table(table, save=False, source_hash=meta.get("sha256"))
+        return True
+
+    def _set_table(self, table, save=False, source_hash=None):
+        if save:
+            try:
+                with LOAD_PHASE_SECONDS.time(phase="feature_save"):
+                    source_hash = self.feature_store.save(self.data_path, self.max_candidates, table)["sha256"]
+            except Exception as e:
+                print(f"Feature cache write failed: {e}")
+        if source_hash is None:
+            source_hash = FeatureStore.file_hash(self.data_path)
+        self.dataset_fingerprint = self._fingerprint(source_hash)
+        with LOAD_PHASE_SECONDS.time(phase="materialize"):
+            self._all_candidates = CandidateStore.from_table(table, *_NUMERIC_COLUMNS)
+        self._skill_index = None
+
+    def reload(self):
+        """Drop the in-memory dataset and read the data file (or its feature cache) again."""
+        self._all_candidates = None
+        self._skill_index = None
+        self._ensure_loaded()
+
+    def get_skill_index(self):
+        """Inverted index over skill_hints for the full dataset, built once on first use."""
+        self._ensure_loaded()
+        if self._skill_index is None:
+            self._skill_index = SkillIndex.build(self._all_candidates.column("skill_hints"))
+        return self._skill_index
+
+    def _fingerprint(self, source_hash):
+        key = f"{source_hash}:{self.max_candidates}:{FEATURE_STORE_VERSION}"
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+
+    def fingerprint(self):
+        """Identity of the loaded candidate set; changes whenever the data does."""
+        self._ensure_loaded()
+        return self.dataset_fingerprint
+
+    def build_feature_cache(self):
+        """Rebuild the on-disk feature cache for the current parquet file."""
+        table = self.build_feature_table()
+        meta = self.feature_store.save(self.data_path, self.max_candidates, table)
+        return meta
 
     def load_candidates(self, position_filter=None):
         """
-        Returns cached candidates; optional position filter is applied in-memory.
+        Returns the cached CandidateStore; with a position filter, the matching rows as a list.
         """
         self._ensure_loaded()
-        cands = self._all_candidates or []
+        cands = self._all_candidates
         if position_filter:
             pf = position_filter.lower()
-            cands = [c for c in cands if pf in self._to_str(c.get("Position", "")).lower()]
+            rows = [r for pos, r in cands.category_rows("Position").items() if pf in self._to_str(pos).lower()]
+            cands = [cands[i] for i in np.sort(np.concatenate(rows))] if rows else []
         return cands
 
 if __name__ == "__main__":
-    loader = DataLoader()
-    candidates = loader.load_candidates()
-    print(f"Loaded {len(candidates)} candidates.")
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--data", default="candidates.parquet")
+    parser.add_argument("--build-features", action="store_true", help="(re)build the on-disk feature cache and exit")
+    args = parser.parse_args()
+
+    loader = DataLoader(data_path=args.data)
+    if args.build_features:
+        meta = loader.build_feature_cache()
+        print(f"Feature cache written: {meta['rows']} rows (sha256 {meta['sha256'][:12]}).")
+    else:
+        candidates = loader.load_candidates()
+        print(f"Loaded {len(candidates)} candidates.")
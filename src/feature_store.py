@@ -0,0 +1,122 @@
+import hashlib
+import json
+import os
+
+import pyarrow as pa
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Bump when the derived fields written by DataLoader change shape or meaning.
+FEATURE_STORE_VERSION = 4
+
+
+class FeatureStore:
+    """On-disk columnar cache of DataLoader's preprocessed candidates.
+
+    Each cache entry is an uncompressed Arrow IPC file (memory-mappable) plus a
+    JSON sidecar recording the source parquet's mtime, size and SHA-256. A
+    matching mtime/size is trusted as-is; otherwise the content hash decides
+    whether the entry is still valid, so touching the file does not force a
+    rebuild.
+    """
+
+    def __init__(self, cache_dir=None):
+        if cache_dir is None:
+            cache_dir = os.getenv("FEATURE_CACHE_DIR", os.path.join(_PROJECT_ROOT, ".cache", "features"))
+        self.cache_dir = cache_dir
+
+    def _paths(self, source_path, max_candidates):
+        # Same-named files in different directories must not share (and overwrite) one entry
+        path_hash = hashlib.sha256(os.path.abspath(source_path).encode("utf-8")).hexdigest()[:12]
+        base = f"{os.path.basename(source_path)}.{path_hash}.{int(max_candidates)}"
+        return (
+            os.path.join(self.cache_dir, base + ".arrow"),
+            os.path.join(self.cache_dir, base + ".json"),
+        )
+
+    @staticmethod
+    def file_hash(path, chunk_size=1 << 20):
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                h.update(chunk)
+        return h.hexdigest()
+
+    def lookup(self, source_path, max_candidates):
+        """Return the sidecar metadata if a valid cache entry exists, else None."""
+        data_path, meta_path = self._paths(source_path, max_candidates)
+        if not (os.path.exists(data_path) and os.path.exists(meta_path)):
+            return None
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except Exception:
+            return None
+        if meta.get("version") != FEATURE_STORE_VERSION or meta.get("max_candidates") != int(max_candidates):
+            return None
+        if meta.get("source") != os.path.abspath(source_path):
+            return None
+        st = os.stat(source_path)
+        if meta.get("mtime") == st.st_mtime and meta.get("size") == st.st_size:
+            return meta
+        if meta.get("size") != st.st_size or meta.get("sha256") != self.file_hash(source_path):
+            return None
+        # Same content, new mtime: refresh the sidecar so the next start takes the fast path.
+        meta["mtime"] = st.st_mtime
+        self._write_json(meta_path, meta)
+        return meta
+
+    def load(self, source_path, max_candidates):
+        """Memory-map a valid cache entry. Returns (table, meta) or None."""
+        meta = self.lookup(source_path, max_candidates)
+        if meta is None:
+            return None
+        data_path, _ = self._paths(source_path, max_candidates)
+        # The returned table references the mapping directly, so keep it open.
+        source = pa.memory_map(data_path, "r")
+        table = pa.ipc.open_file(source).read_all()
+        return table, meta
+
+    def save(self, source_path, max_candidates, table, source_hash=None):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        data_path, meta_path = self._paths(source_path, max_candidates)
+        st = os.stat(source_path)
+        meta = {
+            "version": FEATURE_STORE_VERSION,
+            "source": os.path.abspath(source_path),
+            "mtime": st.st_mtime,
+            "size": st.st_size,
+            "sha256": source_hash or self.file_hash(source_path),
+            "max_candidates": int(max_candidates),
+            "rows": table.num_rows,
+        }
+        tmp_path = f"{data_path}.{os.getpid()}.tmp"
+        with pa.OSFile(tmp_path, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, data_path)
+        self._write_json(meta_path, meta)
+        return meta
+
+    @staticmethod
+    def _write_json(path, obj):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(obj, f)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def column_array(values):
+        """Arrow array for a raw DataFrame column; mixed-type columns are stored as strings."""
+        try:
+            return pa.array(values)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            return pa.array(["" if v is None else v if isinstance(v, str) else str(v) for v in values], type=pa.string())
+
+    @staticmethod
+    def concat_chunks(chunks):
+        """One column from per-batch arrays; falls back to strings when batches inferred different types."""
+        if len({chunk.type for chunk in chunks}) > 1:
+            chunks = [chunk if chunk.type == pa.string() else FeatureStore.column_array(
+                ["" if v is None else v if isinstance(v, str) else str(v) for v in chunk.to_pylist()]) for chunk in chunks]
+        return pa.concat_arrays(chunks)
@@ -0,0 +1,106 @@
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+from scipy import sparse
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+INDEX_STORE_VERSION = 3
+_CSR_PARTS = ("data", "indices", "indptr")
+
+
+class IndexStore:
+    """Fitted TF-IDF vectorizers and their CSR matrices persisted across restarts.
+
+    An entry is a directory named after a key derived from the dataset
+    fingerprint and the vectorizer parameters. Each vectorizer is stored as a
+    vocabulary JSON plus an IDF array; each CSR matrix as its raw
+    data/indices/indptr arrays in ``.npy`` files. ``meta.json`` is written last
+    and marks the entry as complete.
+
+    With ``mmap`` (INDEX_MMAP, on by default) the arrays are memory-mapped
+    read-only instead of read into process memory, so every worker on a host
+    that loads the same entry shares one copy through the page cache.
+    """
+
+    def __init__(self, cache_dir=None, mmap=None):
+        if cache_dir is None:
+            cache_dir = os.getenv("INDEX_CACHE_DIR", os.path.join(_PROJECT_ROOT, ".cache", "index"))
+        if mmap is None:
+            mmap = os.getenv("INDEX_MMAP", "1") != "0"
+        self.cache_dir = cache_dir
+        self.mmap = mmap
+
+    @staticmethod
+    def make_key(fingerprint, vectorizers, extra=None):
+        parts = [str(INDEX_STORE_VERSION), str(fingerprint), repr(extra)]
+        for name in sorted(vectorizers):
+            params = vectorizers[name].get_params()
+            parts.append(f"{name}={sorted((k, repr(v)) for k, v in params.items())}")
+        return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()[:24]
+
+    def load(self, key, vectorizers):
+        """Restore fitted state into ``vectorizers`` (name -> unfitted TfidfVectorizer).
+
+        Returns {name: matrix} on success (CSR, or a dense array if one was saved),
+        None if the entry is missing or unreadable.
+        """
+        entry = os.path.join(self.cache_dir, key)
+        meta_path = os.path.join(entry, "meta.json")
+        if not os.path.exists(meta_path):
+            return None
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            shapes, dense = meta["shapes"], set(meta.get("dense", ()))
+            matrices = {}
+            for name, vec in vectorizers.items():
+                with open(os.path.join(entry, f"{name}.vocab.json"), "r", encoding="utf-8") as f:
+                    vocabulary = json.load(f)
+                idf = np.load(os.path.join(entry, f"{name}.idf.npy"))
+                # vocabulary_ must be set before idf_ (the setter validates the length).
+                vec.vocabulary_ = vocabulary
+                vec.idf_ = idf
+                if name in dense:
+                    matrices[name] = np.load(os.path.join(entry, f"{name}.dense.npy"), mmap_mode="r" if self.mmap else None)
+                    continue
+                parts = [
+                    np.load(os.path.join(entry, f"{name}.{part}.npy"), mmap_mode="r" if self.mmap else None)
+                    for part in _CSR_PARTS
+                ]
+                # Built from the arrays as-is, so a memory-mapped matrix stays zero-copy
+                matrices[name] = sparse.csr_matrix(tuple(parts), shape=tuple(shapes[name]), copy=False)
+            return matrices
+        except Exception as e:
+            print(f"Index cache load failed ({key}): {e}")
+            return None
+
+    def save(self, key, vectorizers, matrices, meta=None):
+        entry = os.path.join(self.cache_dir, key)
+        tmp_entry = f"{entry}.{os.getpid()}.tmp"
+        shutil.rmtree(tmp_entry, ignore_errors=True)
+        os.makedirs(tmp_entry, exist_ok=True)
+        shapes, dense = {}, []
+        for name, vec in vectorizers.items():
+            vocabulary = {term: int(i) for term, i in vec.vocabulary_.items()}
+            with open(os.path.join(tmp_entry, f"{name}.vocab.json"), "w", encoding="utf-8") as f:
+                json.dump(vocabulary, f, ensure_ascii=False)
+            np.save(os.path.join(tmp_entry, f"{name}.idf.npy"), vec.idf_)
+            if isinstance(matrices[name], np.ndarray):
+                np.save(os.path.join(tmp_entry, f"{name}.dense.npy"), matrices[name])
+                shapes[name] = list(matrices[name].shape)
+                dense.append(name)
+                continue
+            matrix = matrices[name].tocsr()
+            if not matrix.has_sorted_indices:
+                matrix = matrix.sorted_indices()
+            for part in _CSR_PARTS:
+                np.save(os.path.join(tmp_entry, f"{name}.{part}.npy"), getattr(matrix, part))
+            shapes[name] = list(matrix.shape)
+        with open(os.path.join(tmp_entry, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"version": INDEX_STORE_VERSION, "shapes": shapes, "dense": dense, **(meta or {})}, f)
+        shutil.rmtree(entry, ignore_errors=True)
+        os.replace(tmp_entry, entry)
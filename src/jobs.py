@@ -0,0 +1,106 @@
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Job:
+    """One queued match request and, once finished, its results."""
+
+    def __init__(self, params):
+        self.id = uuid.uuid4().hex
+        self.params = params
+        self.state = "queued"  # queued -> running -> done | error
+        self.result = None
+        self.error = None
+        self.progress = None
+        self.timings = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+
+    @property
+    def is_finished(self):
+        return self.state in ("done", "error")
+
+    def to_dict(self, cursor=None, include_result=True, include_timings=False):
+        data = {
+            "job_id": self.id,
+            "state": self.state,
+            "error": self.error,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+        }
+        if self.progress is not None:
+            data.update(self.progress.snapshot(cursor=cursor))
+        else:
+            data.update({"percentage": 100 if self.is_finished else 0, "status": self.state, "logs": [], "cursor": cursor})
+        if include_result and self.state == "done":
+            data["results"] = self.result
+        if include_timings and self.timings is not None:
+            data["timings"] = self.timings
+        return data
+
+
+class JobManager:
+    """Runs match jobs on a background thread pool and keeps recent jobs in memory.
+
+    ``runner(job)`` does the work and returns the result; raising (or setting
+    ``job.error``) marks the job as failed. Finished jobs are kept for
+    ``JOB_TTL`` seconds, and at most ``JOB_MAX_KEPT`` jobs are retained.
+    Jobs are per process, so serve the app from a single (threaded) worker.
+    """
+
+    def __init__(self, runner, max_workers=None, ttl=None, max_kept=None):
+        if max_workers is None:
+            max_workers = int(os.getenv("JOB_WORKERS", "4"))
+        if ttl is None:
+            ttl = float(os.getenv("JOB_TTL", "3600"))
+        if max_kept is None:
+            max_kept = int(os.getenv("JOB_MAX_KEPT", "1000"))
+        self.runner = runner
+        self.ttl = ttl
+        self.max_kept = max(1, int(max_kept))
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max(1, int(max_workers)), thread_name_prefix="match-job")
+
+    def submit(self, **params):
+        job = Job(params)
+        with self._lock:
+            self._evict()
+            self._jobs[job.id] = job
+        self._executor.submit(self._run, job)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run(self, job):
+        job.state = "running"
+        job.started = time.time()
+        try:
+            job.result = self.runner(job)
+            job.state = "error" if job.error else "done"
+        except Exception as e:
+            print(f"Job {job.id} failed: {e}")
+            job.error = str(e)
+            job.state = "error"
+        finally:
+            job.finished = time.time()
+
+    def _evict(self):
+        now = time.time()
+        expired = [jid for jid, j in self._jobs.items() if j.is_finished and now - j.finished > self.ttl]
+        for jid in expired:
+            del self._jobs[jid]
+        # Oldest first; running or queued jobs are never dropped
+        for jid in list(self._jobs):
+            if len(self._jobs) < self.max_kept:
+                break
+            if self._jobs[jid].is_finished:
+                del self._jobs[jid]
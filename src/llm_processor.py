@@ -2,6 +2,7 @@ import re
 import json
 import random
 import numpy as np
+import scipy.sparse as sp
 from sklearn.feature_extraction.text import TfidfVectorizer
 
 class Metadata:
@@ -54,15 +55,30 @@ class LLMProcessor:
         """
         Generates a vector embedding for the text.
         """
+        return self.get_embeddings([text])[0].tolist()
+
+    def get_embeddings(self, texts, batch_size=1024, sparse=False):
+        """
+        Embeds many texts at once, transforming ``batch_size`` texts per call.
+        Returns a float32 array of shape (len(texts), n_features), or a float32
+        CSR matrix when ``sparse`` is True. The vectorizer must be fitted first.
+        """
         if not self.is_fitted:
-            # Fallback if not fitted (should not happen if initialized correctly)
-            # Use a dummy fit on the single text to avoid crash
-            self.vectorizer.fit([text])
-            self.is_fitted = True
-            
-        # Transform returns a sparse matrix, convert to dense array
-        vector = self.vectorizer.transform([text]).toarray()[0]
-        return vector.tolist()
+            raise RuntimeError("LLMProcessor vectorizer is not fitted; call fit_vectorizer(corpus) first.")
+        texts = list(texts)
+        n_features = len(self.vectorizer.vocabulary_)
+        if sparse:
+            if not texts:
+                return sp.csr_matrix((0, n_features), dtype=np.float32)
+            return sp.vstack(
+                [self.vectorizer.transform(texts[i:i + batch_size]) for i in range(0, len(texts), batch_size)],
+                format="csr",
+            ).astype(np.float32)
+        out = np.empty((len(texts), n_features), dtype=np.float32)
+        for i in range(0, len(texts), batch_size):
+            batch = self.vectorizer.transform(texts[i:i + batch_size])
+            out[i:i + batch.shape[0]] = batch.toarray()
+        return out
 
     def extract_metadata(self, candidate_record):
         """
@@ -1,7 +1,11 @@
+import hashlib
 import json
 import os
+import time
 from typing import Any, Dict, Optional
-from openai import OpenAI
+from openai import APITimeoutError, OpenAI
+
+from src.metrics import LLM_CALL_SECONDS, LLM_CALLS_TOTAL
 
 # Qwen API config (env overrides)
 QWEN_API_KEY = os.getenv("QWEN_API_KEY", "ms-60c5577d-33b4-401f-ac7f-2479fdf4dfd5")
@@ -9,6 +13,8 @@ QWEN_BASE_URL = os.getenv("QWEN_BASE_URL", "https://api-inference.modelscope.cn/
 QWEN_MODEL = os.getenv("QWEN_MODEL", "Qwen/Qwen2.5-7B-Instruct")
 # Keep the LLM call fast to avoid worker timeouts; override via QWEN_TIMEOUT if needed
 LLM_TIMEOUT = float(os.getenv("QWEN_TIMEOUT", "8"))  # seconds (read timeout)
+# Cache LLM responses (JD analysis, fit scores) through CacheManager when one is provided
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE", "1") != "0"
 
 class LLMService:
     ENGLISH_LEVELS = ("basic", "pre", "intermediate", "upper", "fluent")
@@ -19,12 +25,16 @@ class LLMService:
         "upper": 4,
         "fluent": 5,
     }
+    # Bump a version whenever its prompt changes so stale cached responses are not reused.
+    JD_PROMPT_VERSION = 1
+    SCORE_PROMPT_VERSION = 1
 
-    def __init__(self):
+    def __init__(self, cache=None):
         # Use Qwen model on DashScope
         self.model = QWEN_MODEL
         self.api_key = QWEN_API_KEY
         self.client = OpenAI(api_key=self.api_key, base_url=QWEN_BASE_URL)
+        self.cache = cache if LLM_CACHE_ENABLED else None
 
     @classmethod
     def normalize_english_level(cls, value: Any) -> Optional[str]:
@@ -144,7 +154,7 @@ Required JSON Structure:
   "english_level": "string or null"
 }}
 """
-        parsed = self._call_llm(prompt)
+        parsed = self._call_llm(prompt, kind="parse_resume")
         return self._postprocess_parsed_resume(parsed)
 
     def analyze_jd(self, jd_text):
@@ -180,7 +190,7 @@ Required JSON schema:
   }}
 }}
 """
-        analysis = self._call_llm(prompt)
+        analysis = self._call_llm_cached("analyze_jd", self.JD_PROMPT_VERSION, [jd_text], prompt)
         return self._postprocess_jd_analysis(analysis)
 
     def score_candidate_for_jd(self, jd_text, candidate_summary):
@@ -206,12 +216,31 @@ Respond JSON:
   "verdict": "short sentence"
 }}
 """
-        return self._call_llm(prompt)
+        return self._call_llm_cached("score_candidate", self.SCORE_PROMPT_VERSION, [jd_text, candidate_summary], prompt)
+
+    def _cache_key(self, kind, version, inputs):
+        payload = json.dumps([self.model, kind, version, inputs], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _call_llm_cached(self, kind, version, inputs, prompt):
+        """``_call_llm`` behind the response cache; only successful (dict) responses are stored."""
+        if self.cache is None:
+            return self._call_llm(prompt, kind=kind)
+        key = self._cache_key(kind, version, inputs)
+        cached = self.cache.get_cached_response(key)
+        if cached is not None:
+            return cached
+        result = self._call_llm(prompt, kind=kind)
+        if isinstance(result, dict):
+            self.cache.set_cached_response(key, result)
+        return result
 
-    def _call_llm(self, prompt):
+    def _call_llm(self, prompt, kind="llm"):
         if not self.api_key:
             print("LLM call aborted: missing API_KEY")
             return None
+        outcome = "ok"
+        start = time.perf_counter()
         try:
             resp = self.client.chat.completions.create(
                 model=self.model,
@@ -225,15 +254,28 @@ Respond JSON:
             )
             content = resp.choices[0].message.content
             if not content:
+                outcome = "empty"
                 return None
             if "```json" in content:
                 content = content.split("```json")[1].split("```")[0]
             elif "```" in content:
                 content = content.split("```")[1].split("```")[0]
             return json.loads(content.strip())
+        except json.JSONDecodeError as e:
+            outcome = "parse_error"
+            print(f"LLM returned invalid JSON: {e}")
+            return None
+        except APITimeoutError as e:
+            outcome = "timeout"
+            print(f"LLM Exception: {e}")
+            return None
         except Exception as e:
+            outcome = "error"
             print(f"LLM Exception: {e}")
             return None
+        finally:
+            LLM_CALL_SECONDS.observe(time.perf_counter() - start, kind=kind)
+            LLM_CALLS_TOTAL.inc(kind=kind, outcome=outcome)
 
     def _postprocess_parsed_resume(self, parsed: Any) -> Dict[str, Any]:
         if not isinstance(parsed, dict):
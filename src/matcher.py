@@ -1,46 +1,137 @@
+from src.cache_manager import CacheManager, LLM_CACHE_DB_PATH
+from src.candidate_index import CandidateIndex
+from src.candidate_store import CandidateStore
 from src.data_loader import DataLoader
-from src.llm_service import LLMService
+from src.index_store import IndexStore
+from src.llm_processor import LLMProcessor
+from src.llm_service import LLM_CACHE_ENABLED, LLMService
+from src.metrics import MATCH_STAGE_SECONDS, MATCHES_TOTAL, STAGE2_CANDIDATE_SECONDS
+from src.progress import ProgressReporter
+from src.skill_index import SkillIndex
+from src.vector_store import VectorStore
+from sklearn.base import clone
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+from sklearn.preprocessing import normalize
+from scipy import sparse
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+import numpy as np
 import os
+import threading
 import time
 
 
+class MatchContext:
+    """Per-request state of one ``SmartMatcher.match`` call: progress, error, results and stage timings."""
+
+    def __init__(self, progress=None):
+        self.progress = progress if progress is not None else ProgressReporter()
+        self.error = None
+        self.results = None
+        self.timings = {}
+
+
 class SmartMatcher:
     def __init__(self):
         self.data_loader = DataLoader()
-        self.llm = LLMService()
+        llm_cache = CacheManager(db_path=LLM_CACHE_DB_PATH, tables=("llm_responses",)) if LLM_CACHE_ENABLED else None
+        self.llm = LLMService(cache=llm_cache)
 
+        # Unfitted templates; every index snapshot fits its own clones.
         self.vectorizer = TfidfVectorizer(stop_words='english', max_features=384)
         self.skill_vectorizer = TfidfVectorizer(analyzer='char_wb', ngram_range=(3, 5), max_features=4096)
 
-        self.candidates_cache = []
-        self._initialized = False
-        self._text_matrix = None
-        self._skill_matrix = None
-        self.current_role = None
+        self.index_store = IndexStore()
+        self.use_index_cache = os.getenv("INDEX_CACHE", "1") != "0"
+
+        # Current CandidateIndex snapshot; replaced as a whole, never modified in place
+        self._index = None
+        self._index_lock = threading.Lock()
+        self.role_view_cache_size = int(os.getenv("ROLE_VIEW_CACHE_SIZE", "64"))
+        # Optional embedding retrieval ahead of Stage-1 (0 = score every candidate)
+        self.retrieval_shortlist = int(os.getenv("RETRIEVAL_SHORTLIST", "0"))
+        self.embedder = None
+        # Progress/error of calls made without an explicit MatchContext (legacy single-user API)
         self.last_error = None
-        self.last_progress: list[str] = []
-        self.current_percent = 0
-        self.current_status = "Idle"
+        self.progress = ProgressReporter()
+        self._local = threading.local()
 
         self.top_k = int(os.getenv("TOP_K_RESULTS", "100"))
         self.stage1_limit = int(os.getenv("STAGE1_LIMIT", "20"))
         self.stage2_limit = int(os.getenv("STAGE2_LIMIT", "5"))
         self.stage2_weight = float(os.getenv("STAGE2_WEIGHT", "0.4"))
         self.stage2_max_seconds = float(os.getenv("STAGE2_MAX_SECONDS", "8"))
+        # Concurrent LLM calls per request. The pool is shared by every request, so it gets room for
+        # JOB_WORKERS concurrent matches; a smaller pool lets requests queue behind each other (and
+        # behind abandoned calls still running until QWEN_TIMEOUT) until their Stage-2 budget is gone.
+        self.stage2_concurrency = max(1, int(os.getenv("STAGE2_CONCURRENCY", str(self.stage2_limit))))
+        job_workers = max(1, int(os.getenv("JOB_WORKERS", "4")))
+        self._stage2_executor = ThreadPoolExecutor(
+            max_workers=self.stage2_concurrency * job_workers, thread_name_prefix="stage2")
+
+        # Optional skill prefilter: "off", "union" or "intersection" of required-skill postings
+        self.skill_prefilter = os.getenv("SKILL_PREFILTER", "off").lower()
+        # Fall back to the unfiltered pool when the prefilter keeps fewer rows than this
+        self.skill_prefilter_min = int(os.getenv("SKILL_PREFILTER_MIN", str(max(self.stage1_limit, self.top_k))))
+        # Sharded Stage-1: split the pool across a thread pool (sparse products release the GIL)
+        self.stage1_workers = max(1, int(os.getenv("STAGE1_WORKERS", "1")))
+        self.stage1_min_shard_rows = max(1, int(os.getenv("STAGE1_MIN_SHARD_ROWS", "5000")))
+        self._stage1_executor = None
+        if self.stage1_workers > 1:
+            self._stage1_executor = ThreadPoolExecutor(max_workers=self.stage1_workers, thread_name_prefix="stage1")
+        # Background refit of ingested candidates (seconds between checks; 0 = never)
+        self.ingest_refit_interval = float(os.getenv("INGEST_REFIT_INTERVAL", "600"))
+        self.ingest_refit_min_rows = max(1, int(os.getenv("INGEST_REFIT_MIN_ROWS", "1")))
+        self._refit_thread = None
+        # "score": unmet experience/English requirements only lower the Stage-1 score;
+        # "exclude": candidates failing them are dropped before any similarity math
+        self.hard_filter = os.getenv("HARD_FILTER", "score").lower()
+
+    @property
+    def last_progress(self) -> list[str]:
+        return self.progress.lines()
+
+    @property
+    def current_percent(self) -> int:
+        return self.progress.percent
+
+    @property
+    def current_status(self) -> str:
+        return self.progress.status
+
+    @property
+    def index(self):
+        """The current CandidateIndex snapshot (None until initialized)."""
+        return self._index
+
+    @property
+    def candidates_cache(self):
+        index = self._index
+        return list(index.candidates) if index is not None else []
+
+    def _reporter(self):
+        # The context of the match running on this thread, else the shared reporter
+        ctx = getattr(self._local, "ctx", None)
+        return ctx.progress if ctx is not None else self.progress
 
     def _log(self, message: str):
-        msg = str(message).strip()
-        if not msg:
-            return
-        self.last_progress.append(msg)
-        print(msg)
+        self._reporter().log(message)
+
+    def _set_progress(self, percent: float, status: str, throttle: bool = False):
+        self._reporter().update(percent, status, throttle=throttle)
 
-    def _set_progress(self, percent: float, status: str):
-        self.current_percent = int(max(0, min(100, percent)))
-        self.current_status = status
-        self._log(status)
+    @contextmanager
+    def _span(self, stage):
+        """Time one match stage into the stage histogram and this request's timings (seconds)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            MATCH_STAGE_SECONDS.observe(elapsed, stage=stage)
+            ctx = getattr(self._local, "ctx", None)
+            if ctx is not None:
+                ctx.timings[stage] = ctx.timings.get(stage, 0.0) + elapsed
 
     def _chunk_text(self, text, chunk_word_count=80, overlap_word_count=40, max_chunks=50):
         if not isinstance(text, str):
@@ -72,31 +163,432 @@ class SmartMatcher:
                 tokens.append(t)
         return tokens
 
-    def _ensure_initialized(self, position_filter=None):
-        if self._initialized and position_filter == self.current_role:
-            return True
-        try:
-            self.last_progress = []
+    def _ensure_initialized(self):
+        """Return the current index snapshot, building it on first use."""
+        index = self._index
+        if index is not None:
+            return index
+        with self._index_lock:
+            if self._index is None:
+                self._index = self._build_index()
+            return self._index
+
+    def rebuild_index(self, reload_data=False, refit=False):
+        """Build a fresh snapshot and swap it in; in-flight matches finish on the old one.
+
+        ``refit`` ignores a cached TF-IDF index and fits (and republishes) a new one.
+        Candidates added through ``ingest`` are replayed onto the rebuilt snapshot.
+        """
+        with self._index_lock:
+            if reload_data:
+                self.data_loader.reload()
+            try:
+                index = self._build_index(refit=refit)
+            except Exception as e:
+                self._log(f"Index rebuild failed, keeping the current snapshot: {e}")
+                return None
+            self._index = index
+            return index
+
+    def _build_index(self, refit=False, candidates=None):
+        """Build a snapshot from the data loader, or refit one over ``candidates`` if given."""
+        from_loader = candidates is None
+        if from_loader:
             self._log("Loading candidates...")
-            self.candidates_cache = self.data_loader.load_candidates(position_filter=position_filter)
-            docs = [c.get("Long Description", "") for c in self.candidates_cache]
-            skill_docs = [" ".join(c.get("skill_hints", [])) for c in self.candidates_cache]
-
-            if docs:
-                self.vectorizer.fit(docs)
-                self._text_matrix = self.vectorizer.transform(docs)
-            if skill_docs:
-                self.skill_vectorizer.fit(skill_docs)
-                self._skill_matrix = self.skill_vectorizer.transform(skill_docs)
-
-            self.current_role = position_filter
-            self._initialized = True
-            self._log(f"Initialized {len(self.candidates_cache)} candidates (max {self.data_loader.max_candidates}).")
-            return True
+            candidates = self.data_loader.load_candidates()
+        elif not isinstance(candidates, CandidateStore):
+            _, _, exp_years, english_rank = self._build_stage1_columns(candidates)
+            candidates = CandidateStore.from_records(candidates, exp_years, english_rank)
+        fitted = None
+        if candidates:
+            if from_loader and not refit:
+                fitted = self._load_index(candidates)
+            # Only fits of the loader's data are published to the index cache
+            fitted = fitted or self._fit_index(candidates, save=from_loader)
+        vectorizer, skill_vectorizer, text_matrix, skill_matrix = fitted or (
+            clone(self.vectorizer), clone(self.skill_vectorizer), None, None)
+        lf_matrix, lf_vocab, exp_years, english_rank = self._build_stage1_columns(candidates)
+        skill_index = None
+        if self.skill_prefilter != "off":
+            skill_index = (self.data_loader.get_skill_index() if from_loader
+                           else SkillIndex.build(candidates.column("skill_hints")))
+        embedder, vector_store = self._build_retrieval_index(
+            candidates, load=from_loader and not refit, save=from_loader)
+        index = CandidateIndex(
+            candidates, vectorizer, skill_vectorizer, text_matrix, skill_matrix,
+            lf_matrix, lf_vocab, exp_years, english_rank, self._build_position_index(candidates),
+            skill_index=skill_index, embedder=embedder, vector_store=vector_store,
+            fingerprint=self.data_loader.fingerprint(), role_view_cache_size=self.role_view_cache_size,
+        )
+        if from_loader:
+            # Ingested candidates are stored apart from the data file; replay them as pending rows
+            ingested = self.data_loader.load_ingested()
+            if ingested:
+                index = self._ingest_into(index, ingested)
+                self._log(f"Replayed {len(ingested)} ingested candidates.")
+                self._start_refit_worker()
+        self._log(f"Initialized {len(index)} candidates (max {self.data_loader.max_candidates}).")
+        return index
+
+    def ingest(self, raw_candidates):
+        """Add or update candidates without refitting; they are searchable once this returns.
+
+        New rows are transformed with the snapshot's fitted vectorizers and
+        appended to its matrices and indexes in a new snapshot (copy-on-write);
+        a candidate whose id is already indexed replaces that row. Terms outside
+        the fitted vocabulary are ignored until the background refit runs.
+        The records are also stored (``INGEST_DB_PATH``) so index rebuilds and
+        restarts replay them.
+        """
+        accepted = []
+        prepared = []
+        skipped = 0
+        for raw in raw_candidates or []:
+            if not isinstance(raw, dict) or raw.get("id") in (None, ""):
+                skipped += 1
+                continue
+            accepted.append(raw)
+            prepared.append(self.data_loader.prepare_candidate(raw))
+        self._ensure_initialized()
+        persisted = True
+        try:
+            self.data_loader.save_ingested(accepted)
         except Exception as e:
-            self.last_error = str(e)
-            self._log(f"Initialization failed: {e}")
-            return False
+            persisted = False
+            self._log(f"Storing ingested candidates failed; they are kept until the next rebuild: {e}")
+        with self._index_lock:
+            old = self._index
+            new_rows = len({str(c["id"]) for c in prepared} - set(old.id_rows))
+            if prepared:
+                self._index = self._ingest_into(old, prepared)
+            index = self._index
+        self._log(f"Ingested {len(prepared)} candidates ({new_rows} new, {len(prepared) - new_rows} updated).")
+        self._start_refit_worker()
+        return {
+            "added": new_rows,
+            "updated": len(prepared) - new_rows,
+            "skipped": skipped,
+            "total": len(index),
+            "pending_refit": index.pending_rows,
+            "persisted": persisted,
+        }
+
+    def _ingest_into(self, old, prepared):
+        """New snapshot equal to ``old`` plus the prepared candidates (``old`` is not modified)."""
+        n_old = len(old)
+        id_rows = dict(old.id_rows)
+        changed = {}
+        next_row = n_old
+        for cand in prepared:
+            cid = str(cand["id"])
+            row = id_rows.get(cid)
+            if row is None:
+                row = id_rows[cid] = next_row
+                next_row += 1
+            changed[row] = cand
+        rows = np.fromiter(sorted(changed), dtype=np.intp, count=len(changed))
+        cands = [changed[r] for r in rows.tolist()]
+        lf_add, lf_vocab, exp_add, eng_add = self._build_stage1_columns(cands, dict(old.lf_vocab))
+        candidates = old.candidates.with_rows(rows, cands, exp_add, eng_add)
+        if old.text_matrix is None:
+            # Nothing fitted yet (empty dataset): fit over everything instead
+            return self._build_index(candidates=candidates)
+
+        append_only = bool(len(rows) == 0 or rows[0] >= n_old)
+
+        def extend(matrix, added):
+            stacked = sparse.vstack([matrix, added], format="csr")
+            if append_only:
+                return stacked
+            # Point each updated row at its replacement in the stacked matrix
+            order = np.arange(len(candidates), dtype=np.intp)
+            order[rows] = n_old + np.arange(len(rows))
+            return stacked[order]
+
+        docs = [c.get("Long Description", "") for c in cands]
+        text_matrix = extend(old.text_matrix, normalize(old.vectorizer.transform(docs)))
+        skill_matrix = extend(old.skill_matrix, normalize(old.skill_vectorizer.transform(
+            [" ".join(c.get("skill_hints", [])) for c in cands])))
+
+        # Tokens first seen in this batch widen the matrix by new (empty for old rows) columns
+        lf_old = sparse.csr_matrix(
+            (old.lf_matrix.data, old.lf_matrix.indices, old.lf_matrix.indptr), shape=(n_old, len(lf_vocab)))
+        lf_matrix = extend(lf_old, lf_add)
+
+        skill_index = old.skill_index
+        if skill_index is not None:
+            if append_only:
+                skill_index = skill_index.extended(n_old, (c.get("skill_hints") for c in cands))
+            else:
+                skill_index = SkillIndex.build(candidates.column("skill_hints"))
+
+        vector_rows = old.vector_rows
+        if old.vector_store is not None:
+            # Append-only: older snapshots share the store but never read past their own bound,
+            # and an updated row gets a new entry rather than overwriting the one they score.
+            bound = len(old.vector_rows)
+            old.vector_store.add_documents(
+                ids=[str(bound + i) for i in range(len(rows))],
+                documents=[str(c.get("id", "")) for c in cands],
+                embeddings=old.embedder.get_embeddings(docs),
+            )
+            vector_rows = np.concatenate([old.vector_rows, rows])
+            vector_rows[:bound][np.isin(old.vector_rows, rows)] = -1
+
+        return CandidateIndex(
+            candidates, old.vectorizer, old.skill_vectorizer, text_matrix, skill_matrix,
+            lf_matrix, lf_vocab, candidates.exp_years, candidates.english_rank, self._build_position_index(candidates),
+            skill_index=skill_index, embedder=old.embedder, vector_store=old.vector_store,
+            fingerprint=old.fingerprint, role_view_cache_size=self.role_view_cache_size,
+            fit_token=old.fit_token, ingested=old.ingested + (tuple(prepared),), vector_rows=vector_rows,
+        )
+
+    def refit_index(self):
+        """Refit the vectorizers over the current candidates, including ingested ones.
+
+        The fit runs without holding the index lock; batches ingested meanwhile
+        are replayed onto the refitted snapshot before it is swapped in.
+        """
+        snapshot = self._ensure_initialized()
+        if not snapshot.ingested:
+            return snapshot
+        self._log(f"Refitting index over {len(snapshot)} candidates ({snapshot.pending_rows} ingested)...")
+        # Refitting is also when the text left behind by updated rows is dropped
+        fresh = self._build_index(candidates=snapshot.candidates.compacted())
+        with self._index_lock:
+            current = self._index
+            if current.fit_token is not snapshot.fit_token:
+                # Rebuilt from the data file in the meantime; that snapshot wins
+                return current
+            for batch in current.ingested[len(snapshot.ingested):]:
+                fresh = self._ingest_into(fresh, batch)
+            self._index = fresh
+        return fresh
+
+    def _start_refit_worker(self):
+        if self.ingest_refit_interval <= 0 or self._refit_thread is not None:
+            return
+        self._refit_thread = threading.Thread(target=self._refit_loop, name="index-refit", daemon=True)
+        self._refit_thread.start()
+
+    def _refit_loop(self):
+        while True:
+            time.sleep(self.ingest_refit_interval)
+            try:
+                if self._index is not None and self._index.pending_rows >= self.ingest_refit_min_rows:
+                    self.refit_index()
+            except Exception as e:
+                self._log(f"Background refit failed: {e}")
+
+    def _index_key(self):
+        fingerprint = self.data_loader.fingerprint()
+        if not fingerprint:
+            return None
+        return self.index_store.make_key(fingerprint, {"text": self.vectorizer, "skill": self.skill_vectorizer})
+
+    def _load_index(self, candidates):
+        """Restore fitted vectorizers and matrices from the index cache, if present."""
+        if not self.use_index_cache:
+            return None
+        key = self._index_key()
+        if key is None:
+            return None
+        vectorizer = clone(self.vectorizer)
+        skill_vectorizer = clone(self.skill_vectorizer)
+        matrices = self.index_store.load(key, {"text": vectorizer, "skill": skill_vectorizer})
+        if matrices is None or matrices["text"].shape[0] != len(candidates):
+            return None
+        self._log(f"Loaded TF-IDF index from cache ({key}).")
+        return vectorizer, skill_vectorizer, matrices["text"], matrices["skill"]
+
+    def _fit_index(self, candidates, save=True):
+        # Long Description is built per row here and not kept; only the matrices are
+        docs = candidates.column("Long Description")
+        skill_docs = [" ".join(hints or []) for hints in candidates.column("skill_hints")]
+        vectorizer = clone(self.vectorizer)
+        skill_vectorizer = clone(self.skill_vectorizer)
+        # fit() then transform() rather than fit_transform(): the latter differs in the last ulp.
+        # Rows are L2-normalized once here so Stage-1 cosine is a single sparse product.
+        text_matrix = normalize(vectorizer.fit(docs).transform(docs))
+        skill_matrix = normalize(skill_vectorizer.fit(skill_docs).transform(skill_docs))
+
+        key = self._index_key() if save and self.use_index_cache else None
+        if key is not None:
+            try:
+                self.index_store.save(
+                    key,
+                    {"text": vectorizer, "skill": skill_vectorizer},
+                    {"text": text_matrix, "skill": skill_matrix},
+                    meta={"rows": len(candidates)},
+                )
+            except Exception as e:
+                self._log(f"Index cache write failed: {e}")
+        return vectorizer, skill_vectorizer, text_matrix, skill_matrix
+
+    def _build_stage1_columns(self, cands, lf_vocab=None):
+        """Precompute the per-candidate inputs of Stage-1 that do not depend on the JD.
+
+        ``cands`` is a CandidateStore, or a list of prepared candidate dicts (ingestion).
+        Returns (lf_matrix, lf_vocab, exp_years, english_rank); tokens missing from
+        ``lf_vocab`` are added to it.
+        """
+        lf_vocab = {} if lf_vocab is None else lf_vocab
+        if isinstance(cands, CandidateStore):
+            lf_matrix = self._build_lf_matrix(cands.column("looking_for_text"), lf_vocab)
+            # Numeric columns parsed once at load time (and persisted in the feature cache)
+            return lf_matrix, lf_vocab, cands.exp_years, cands.english_rank
+        lf_matrix = self._build_lf_matrix((c.get('looking_for_text', '') for c in cands), lf_vocab)
+        exp_years = np.fromiter(
+            (self._parse_float(c.get('Experience Years', c.get('Exp Years', 0)), 0.0) for c in cands),
+            dtype=np.float64,
+            count=len(cands),
+        )
+        english_rank = np.fromiter(
+            (LLMService.english_level_rank(c.get("English Level")) for c in cands),
+            dtype=np.int8,
+            count=len(cands),
+        )
+        return lf_matrix, lf_vocab, exp_years, english_rank
+
+    def _build_lf_matrix(self, texts, vocab):
+        """Binary CSR (rows x ``vocab``) of the Looking For tokens in ``texts``."""
+        indices, indptr = [], [0]
+        for text in texts:
+            indices.extend(sorted({vocab.setdefault(t, len(vocab)) for t in self._tokenize_lower(text)}))
+            indptr.append(len(indices))
+        return sparse.csr_matrix(
+            (np.ones(len(indices), dtype=np.int32), np.asarray(indices, dtype=np.int64), np.asarray(indptr, dtype=np.int64)),
+            shape=(len(indptr) - 1, len(vocab)),
+        )
+
+    def _build_position_index(self, cands):
+        """Map each distinct lowercased Position to the rows that carry it."""
+        groups = {}
+        for pos, rows in cands.category_rows("Position").items():
+            groups.setdefault(self.data_loader._to_str(pos).lower(), []).append(rows)
+        return {pos: np.sort(np.concatenate(parts)) if len(parts) > 1 else parts[0] for pos, parts in groups.items()}
+
+    def _hard_requirement_mask(self, index, hard_reqs, rows=None):
+        """Boolean mask over ``rows`` (None = all) of candidates meeting the numeric hard requirements.
+
+        Returns None when the JD sets neither ``min_experience_years`` nor a
+        recognizable ``english_level``.
+        """
+        min_years = self._parse_float(hard_reqs.get('min_experience_years', 0) or 0, 0.0)
+        req_english = hard_reqs.get('english_level', None)
+        req_rank = None
+        if req_english and LLMService.normalize_english_level(req_english):
+            req_rank = LLMService.english_level_rank(req_english)
+        if min_years <= 0 and req_rank is None:
+            return None
+        exp_years, english_rank = index.exp_years, index.english_rank
+        if rows is not None:
+            exp_years, english_rank = exp_years[rows], english_rank[rows]
+        mask = exp_years >= min_years
+        if req_rank is not None:
+            mask &= english_rank >= req_rank
+        return mask
+
+    def _hard_filter_rows(self, index, jd_analysis, rows):
+        """Drop candidates failing the hard requirements when HARD_FILTER=exclude."""
+        if self.hard_filter != "exclude":
+            return rows
+        mask = self._hard_requirement_mask(index, jd_analysis.get('hard_requirements', {}) or {}, rows)
+        if mask is None:
+            return rows
+        kept = np.flatnonzero(mask) if rows is None else rows[mask]
+        self._log(f"Hard-requirement filter kept {len(kept)} candidates.")
+        return kept
+
+    def _skill_prefilter_rows(self, index, jd_analysis, rows):
+        """Restrict ``rows`` (None = all) to candidates sharing the JD's required skills.
+
+        Role keywords are used when the JD lists no required skills. Returns
+        ``rows`` unchanged when the prefilter is off or keeps too few candidates.
+        """
+        if index.skill_index is None or self.skill_prefilter == "off":
+            return rows
+        hard_reqs = jd_analysis.get('hard_requirements', {}) or {}
+        phrases = hard_reqs.get('required_skills', []) or jd_analysis.get('role_keywords', []) or []
+        matched = index.skill_index.match_rows(phrases, mode=self.skill_prefilter)
+        if matched is None:
+            return rows
+        if rows is not None:
+            matched = np.intersect1d(rows, matched, assume_unique=True)
+        if len(matched) < self.skill_prefilter_min:
+            self._log(f"Skill prefilter kept {len(matched)} candidates; falling back to full scan.")
+            return rows
+        self._log(f"Skill prefilter ({self.skill_prefilter}) kept {len(matched)} candidates.")
+        return matched
+
+    def _build_retrieval_index(self, candidates, load=False, save=False):
+        """Embed every candidate once and store the vectors in a VectorStore.
+
+        Uses the TF-IDF embedding of ``LLMProcessor`` unless an embedder exposing
+        ``fit_vectorizer``/``get_embeddings``/``get_embedding`` was assigned to ``self.embedder``.
+        The default embedder's vocabulary and embeddings go through the index cache.
+        Vector ids are store positions; ``CandidateIndex.vector_rows`` maps them to rows.
+        Returns (embedder, vector_store), both None when retrieval is disabled.
+        """
+        if self.retrieval_shortlist <= 0 or not candidates:
+            return None, None
+        # A fresh default embedder per snapshot, so refitting never touches one in use
+        embedder = self.embedder if self.embedder is not None else LLMProcessor()
+        key = None
+        if self.embedder is None and self.use_index_cache and (load or save):
+            key = self._retrieval_key(embedder)
+        embeddings = None
+        if key is not None and load:
+            matrices = self.index_store.load(key, {"embed": embedder.vectorizer})
+            if matrices is not None and matrices["embed"].shape[0] == len(candidates):
+                embedder.is_fitted = True
+                embeddings = matrices["embed"]
+                self._log(f"Loaded retrieval embeddings from cache ({key}).")
+        if embeddings is None:
+            self._log(f"Building retrieval index over {len(candidates)} candidates...")
+            docs = candidates.column("Long Description")
+            embedder.fit_vectorizer(docs)
+            embeddings = embedder.get_embeddings(docs)
+            if key is not None and save:
+                try:
+                    self.index_store.save(key, {"embed": embedder.vectorizer}, {"embed": embeddings},
+                                          meta={"rows": len(candidates)})
+                except Exception as e:
+                    self._log(f"Retrieval cache write failed: {e}")
+        vector_store = VectorStore(collection_name="candidates")
+        vector_store.add_documents(
+            ids=[str(i) for i in range(len(candidates))],
+            documents=[str(cid) for cid in candidates.column("id", "")],
+            embeddings=embeddings,
+        )
+        return embedder, vector_store
+
+    def _retrieval_key(self, embedder):
+        fingerprint = self.data_loader.fingerprint()
+        if not fingerprint:
+            return None
+        return self.index_store.make_key(fingerprint, {"embed": embedder.vectorizer}, extra="retrieval")
+
+    def _retrieve_rows(self, index, query_text, rows):
+        """Narrow ``rows`` (None = all) to the embedding shortlist for this JD."""
+        if index.vector_store is None:
+            return rows
+        total = len(index)
+        pool = total if rows is None else len(rows)
+        if pool <= self.retrieval_shortlist:
+            return rows
+        # Over-fetch in proportion to the role filter so the intersection keeps ~shortlist rows.
+        wanted = min(total, int(self.retrieval_shortlist * total / max(1, pool)))
+        # Entries this snapshot cannot use (superseded, or appended after it) may take places in the hits
+        stored = index.vector_store.count()
+        hits = index.vector_store.query(
+            index.embedder.get_embedding(query_text), n_results=min(stored, wanted + stored - total))
+        positions = np.asarray([int(i) for i in hits["ids"]], dtype=np.intp)
+        shortlist = index.vector_rows[positions[positions < len(index.vector_rows)]]
+        shortlist = np.sort(shortlist[shortlist >= 0][:wanted])
+        if rows is None:
+            return shortlist
+        return np.intersect1d(rows, shortlist, assume_unique=True)
 
     def _parse_float(self, value, default=0.0):
         try:
@@ -104,38 +596,53 @@ class SmartMatcher:
         except Exception:
             return default
 
-    def _stage1_score(self, cand, jd_analysis, jd_vec, jd_skill_vec, idx):
+    def _stage1_scores(self, index, jd_analysis, jd_vec, jd_skill_vec, rows=None):
+        """Batched Stage-1: score the candidates in ``rows`` (default: all) at once.
+
+        Returns the clipped score array plus the per-component arrays needed to
+        rebuild the detail dict of any position via ``_stage1_detail``. Both are
+        aligned with ``rows``.
+        """
         hard_reqs = jd_analysis.get('hard_requirements', {}) or {}
         role_keywords = jd_analysis.get('role_keywords', []) or []
         req_skills = hard_reqs.get('required_skills', []) or []
+        text_matrix, skill_matrix = index.text_matrix, index.skill_matrix
+        lf_matrix, exp_years, english_rank = index.lf_matrix, index.exp_years, index.english_rank
+        if rows is not None:
+            text_matrix = text_matrix[rows] if text_matrix is not None else None
+            skill_matrix = skill_matrix[rows] if skill_matrix is not None else None
+            lf_matrix = lf_matrix[rows]
+            exp_years, english_rank = exp_years[rows], english_rank[rows]
+        n = len(index) if rows is None else len(rows)
+
+        soft_sim = np.zeros(n)
+        if jd_vec is not None and text_matrix is not None:
+            soft_sim = (text_matrix @ normalize(jd_vec).T).toarray().ravel()
+
+        skill_sim = np.zeros(n)
+        if jd_skill_vec is not None and skill_matrix is not None:
+            skill_sim = (skill_matrix @ normalize(jd_skill_vec).T).toarray().ravel()
 
-        cand_text_vec = self._text_matrix[idx] if self._text_matrix is not None else None
-        cand_skill_vec = self._skill_matrix[idx] if self._skill_matrix is not None else None
-
-        soft_sim = 0.0
-        if jd_vec is not None and cand_text_vec is not None:
-            soft_sim = float(cosine_similarity(jd_vec, cand_text_vec)[0][0])
-
-        skill_sim = 0.0
-        if jd_skill_vec is not None and cand_skill_vec is not None:
-            skill_sim = float(cosine_similarity(jd_skill_vec, cand_skill_vec)[0][0])
-
-        lf_tokens = self._tokenize_lower(cand.get('looking_for_text', ''))
         jd_kw_tokens = [k.strip().lower() for k in role_keywords if isinstance(k, str)]
-        lf_overlap = 0.0
-        if jd_kw_tokens and lf_tokens:
-            inter = len(set(jd_kw_tokens) & set(lf_tokens))
-            lf_overlap = inter / max(1, len(set(jd_kw_tokens)))
+        jd_kw_set = set(jd_kw_tokens)
+        lf_overlap = np.zeros(n)
+        # Keyword columns of the Looking For matrix; a row's overlap is how many it has
+        lf_cols = sorted(index.lf_vocab[k] for k in jd_kw_set if k in index.lf_vocab)
+        if lf_cols:
+            denom = max(1, len(jd_kw_set))
+            lf_overlap = np.asarray(lf_matrix[:, lf_cols].sum(axis=1)).ravel() / denom
 
         min_years = hard_reqs.get('min_experience_years', 0) or 0
-        exp_years = self._parse_float(cand.get('Experience Years', cand.get('Exp Years', 0)), 0.0)
-        exp_score = 1.0 if exp_years >= min_years else exp_years / max(1.0, float(min_years) or 1.0)
+        exp_score = np.where(exp_years >= min_years, 1.0, exp_years / max(1.0, float(min_years) or 1.0))
 
         req_english = hard_reqs.get('english_level', None)
-        eng_score = 1.0 if not req_english else (1.0 if LLMService.english_level_satisfies(cand.get("English Level"), req_english) else 0.0)
+        eng_score = np.ones(n)
+        if req_english and LLMService.normalize_english_level(req_english):
+            req_rank = LLMService.english_level_rank(req_english)
+            eng_score = (english_rank >= req_rank).astype(np.float64)
 
         stage1 = 0.35 * skill_sim + 0.35 * soft_sim + 0.15 * lf_overlap + 0.1 * exp_score + 0.05 * eng_score
-        return max(0.0, min(stage1, 1.0)), {
+        return np.clip(stage1, 0.0, 1.0), {
             'soft_sim': soft_sim,
             'skill_sim': skill_sim,
             'lf_overlap': lf_overlap,
@@ -147,9 +654,215 @@ class SmartMatcher:
             'req_skills': req_skills,
         }
 
-    def match(self, query_text: str, position_filter=None, target_role=None):
-        self.last_error = None
-        self.last_progress = []
+    def _stage1_detail(self, components, idx):
+        """Per-candidate view of the arrays returned by ``_stage1_scores``."""
+        return {
+            'soft_sim': float(components['soft_sim'][idx]),
+            'skill_sim': float(components['skill_sim'][idx]),
+            'lf_overlap': float(components['lf_overlap'][idx]),
+            'exp_score': float(components['exp_score'][idx]),
+            'eng_score': float(components['eng_score'][idx]),
+            'exp_years': float(components['exp_years'][idx]),
+            'min_years': components['min_years'],
+            'role_keywords': components['role_keywords'],
+            'req_skills': components['req_skills'],
+        }
+
+    @staticmethod
+    def _top_k_indices(scores, k):
+        """Indices of the ``k`` highest scores, best first.
+
+        Uses ``argpartition`` so only the survivors get sorted. Ties are broken by
+        row index, matching a stable descending sort over the full array.
+        """
+        n = len(scores)
+        k = min(int(k), n)
+        if k <= 0:
+            return np.zeros(0, dtype=np.intp)
+        if k < n:
+            kth = np.partition(scores, n - k)[n - k]
+            above = np.flatnonzero(scores > kth)
+            tied = np.flatnonzero(scores == kth)[: k - len(above)]
+            idx = np.concatenate([above, tied])
+        else:
+            idx = np.arange(n)
+        order = np.lexsort((idx, -scores[idx]))
+        return idx[order]
+
+    def _stage1_top(self, index, jd_analysis, jd_vec, jd_skill_vec, rows, keep):
+        """Stage-1 over ``rows`` (None = all) followed by top-``keep`` selection.
+
+        Returns (order, scores, components, rows) for ``_stage1_result``. Pools
+        large enough are split into contiguous shards scored on the Stage-1
+        pool; each shard keeps its own top-``keep`` and the merge re-selects
+        over the survivors. Survivors are merged in row order, so ties still
+        break by row index and the result equals the single-threaded path.
+        """
+        pool = len(index) if rows is None else len(rows)
+        n_shards = min(self.stage1_workers, pool // self.stage1_min_shard_rows)
+        if self._stage1_executor is None or n_shards < 2:
+            with self._span("stage1"):
+                scores, components = self._stage1_scores(index, jd_analysis, jd_vec, jd_skill_vec, rows)
+            with self._span("select"):
+                order = self._top_k_indices(scores, keep)
+            return order, scores, components, rows
+
+        all_rows = np.arange(pool, dtype=np.intp) if rows is None else np.asarray(rows)
+
+        def score_shard(shard_rows):
+            scores, components = self._stage1_scores(index, jd_analysis, jd_vec, jd_skill_vec, shard_rows)
+            top = np.sort(self._top_k_indices(scores, keep))
+            return shard_rows[top], scores[top], components, top
+
+        with self._span("stage1"):
+            futures = [self._stage1_executor.submit(score_shard, chunk) for chunk in np.array_split(all_rows, n_shards)]
+            shards = [f.result() for f in futures]
+        with self._span("select"):
+            merged_rows = np.concatenate([sh[0] for sh in shards])
+            scores = np.concatenate([sh[1] for sh in shards])
+            components = dict(shards[0][2])
+            for name, value in components.items():
+                if isinstance(value, np.ndarray):
+                    components[name] = np.concatenate([sh[2][name][sh[3]] for sh in shards])
+            order = self._top_k_indices(scores, keep)
+        return order, scores, components, merged_rows
+
+    def _stage1_result(self, index, idx, scores, components, rows=None):
+        cand = index.candidates[idx if rows is None else rows[idx]]
+        stage1_score = float(scores[idx])
+        detail = self._stage1_detail(components, idx)
+        return {
+            "id": cand.get('id'),
+            "name": cand.get('Name') or cand.get('id', 'Unknown'),
+            "position": cand.get('Position'),
+            "english_level": cand.get("English Level"),
+            "skills": cand.get('skill_hints', []),
+            "total_score": round(stage1_score * 100, 1),
+            "hard_pass_rate": round(detail['exp_score'] * 100, 0),
+            "soft_score": round(detail['soft_sim'], 3),
+            "tags": [f"{int(detail['min_years'])}+ Years"] if detail['min_years'] else [],
+            "raw_exp_years": detail['exp_years'],
+            "_stage1": stage1_score,
+            "_cand_ref": cand,
+            "_detail": detail,
+        }
+
+    def _stage2_rerank(self, query_text, pool):
+        """Score ``pool`` against the JD, ``stage2_concurrency`` calls at a time, within one deadline.
+
+        The deadline starts when this request's first call begins running, not
+        while it waits for a pool thread (that wait is itself capped at the same
+        budget). Calls not yet started at the deadline are dropped; ones in
+        flight are abandoned and their candidates keep their Stage-1 score.
+        """
+        queued = list(pool)
+        futures = {}
+        started = []  # monotonic time the first call of this request began
+        submitted = time.monotonic()
+
+        def run(summary):
+            if not started:
+                started.append(time.monotonic())
+            return self._timed_stage2(query_text, summary)
+
+        def dispatch():
+            while queued and len(futures) < self.stage2_concurrency:
+                c = queued.pop(0)
+                cand = c.get('_cand_ref') or {}
+                futures[self._stage2_executor.submit(run, cand.get('Long Description', ''))] = c
+
+        done_count = 0
+        dispatch()
+        while futures:
+            remaining = (started[0] if started else submitted) + self.stage2_max_seconds - time.monotonic()
+            if remaining <= 0:
+                break
+            done, _ = wait(futures, timeout=remaining, return_when=FIRST_COMPLETED)
+            for fut in done:
+                c = futures.pop(fut)
+                self._apply_stage2_score(c, self._stage2_result(fut, c))
+                done_count += 1
+                self._set_progress(
+                    65 + int(done_count / len(pool) * 30),
+                    f"LLM evaluated candidate {c.get('id')} ({done_count}/{len(pool)})...",
+                    throttle=True,
+                )
+            dispatch()
+
+        if futures or queued:
+            abandoned = len(queued)
+            for fut, c in futures.items():
+                if fut.done() and not fut.cancelled():
+                    self._apply_stage2_score(c, self._stage2_result(fut, c))
+                    done_count += 1
+                else:
+                    fut.cancel()
+                    abandoned += 1
+            self._set_progress(95, f"Stage-2 deadline reached: {done_count}/{len(pool)} evaluated, {abandoned} abandoned; returning partial results.")
+
+    def _timed_stage2(self, query_text, summary):
+        start = time.perf_counter()
+        try:
+            return self.llm.score_candidate_for_jd(query_text, summary), time.perf_counter() - start
+        finally:
+            STAGE2_CANDIDATE_SECONDS.observe(time.perf_counter() - start)
+
+    def _stage2_result(self, fut, c=None):
+        try:
+            llm_score_obj, elapsed = fut.result()
+        except Exception as e:
+            self._log(f"Stage-2 evaluation failed: {e}")
+            return None
+        ctx = getattr(self._local, "ctx", None)
+        if ctx is not None and c is not None:
+            ctx.timings.setdefault("stage2_candidates", []).append({"id": c.get("id"), "seconds": elapsed})
+        return llm_score_obj
+
+    def _apply_stage2_score(self, c, llm_score_obj):
+        fit_score = 0.0
+        strengths = []
+        risks = []
+        verdict = ""
+        if isinstance(llm_score_obj, dict):
+            try:
+                fit_score = float(llm_score_obj.get('fit_score', 0) or 0)
+            except Exception:
+                fit_score = 0.0
+            strengths = llm_score_obj.get('strengths') or []
+            risks = llm_score_obj.get('risks') or []
+            verdict = llm_score_obj.get('verdict') or ''
+        combined = (1 - self.stage2_weight) * (c.get('_stage1', 0)) * 100 + self.stage2_weight * fit_score
+        c['total_score'] = round(combined, 1)
+        c['llm_fit_score'] = round(fit_score, 1)
+        c['llm_strengths'] = strengths
+        c['llm_risks'] = risks
+        c['llm_verdict'] = verdict
+
+    def match(self, query_text: str, position_filter=None, target_role=None, context=None):
+        """Rank candidates for ``query_text``.
+
+        Pass a ``MatchContext`` to keep progress and errors private to this
+        request; without one the shared ``progress``/``last_error`` are used.
+        """
+        shared = context is None
+        ctx = MatchContext(self.progress) if shared else context
+        ctx.error = None
+        ctx.timings = {}
+        ctx.progress.reset()
+        self._local.ctx = ctx
+        outcome = "error"
+        try:
+            with self._span("total"):
+                ctx.results = self._run_match(ctx, query_text, position_filter, target_role)
+            outcome = "error" if ctx.error else ("ok" if ctx.results else "empty")
+        finally:
+            self._local.ctx = None
+            MATCHES_TOTAL.inc(outcome=outcome)
+            if shared:
+                self.last_error = ctx.error
+        return ctx.results
+
+    def _run_match(self, ctx, query_text, position_filter, target_role):
         self._set_progress(0, "Initializing...")
 
         # Accept legacy caller argument name
@@ -157,103 +870,81 @@ class SmartMatcher:
             position_filter = target_role
 
         if not isinstance(query_text, str) or not query_text.strip():
-            self.last_error = "Job description is empty"
+            ctx.error = "Job description is empty"
             self._set_progress(0, "Job description is empty")
             return []
 
-        if not self._ensure_initialized(position_filter=position_filter):
+        try:
+            with self._span("init"):
+                index = self._ensure_initialized()
+        except Exception as e:
+            ctx.error = str(e)
+            self._log(f"Initialization failed: {e}")
             self._set_progress(0, "Initialization failed")
             return []
 
         self._set_progress(10, "Step 1: Analyzing JD intent and requirements via LLM...")
-        jd_analysis = self.llm.analyze_jd(query_text) or {"role_keywords": [], "hard_requirements": {}, "soft_requirements": {}, "role_title": None}
+        with self._span("jd_analysis"):
+            jd_analysis = self.llm.analyze_jd(query_text) or {"role_keywords": [], "hard_requirements": {}, "soft_requirements": {}, "role_title": None}
         hard_reqs = jd_analysis.get('hard_requirements', {}) or {}
         role_keywords = jd_analysis.get('role_keywords', []) or []
         req_skills = hard_reqs.get('required_skills', []) or []
 
         jd_vec = None
         jd_skill_vec = None
-        try:
-            if self.vectorizer.vocabulary_:
-                jd_vec = self.vectorizer.transform([query_text])
-            skill_text = " ".join([*role_keywords, *req_skills])
-            if self.skill_vectorizer.vocabulary_ and skill_text.strip():
-                jd_skill_vec = self.skill_vectorizer.transform([skill_text])
-        except Exception as e:
-            self._log(f"Vectorization warning: {e}")
-
-        scored_candidates = []
-        self._set_progress(25, f"Step 2: Stage-1 scoring over {len(self.candidates_cache)} candidates (intent + skills)...")
-        stage1_count = max(1, len(self.candidates_cache))
-        for idx, cand in enumerate(self.candidates_cache):
-            stage1_score, detail = self._stage1_score(cand, jd_analysis, jd_vec, jd_skill_vec, idx)
-            scored_candidates.append({
-                "id": cand.get('id'),
-                "name": cand.get('Name') or cand.get('id', 'Unknown'),
-                "position": cand.get('Position'),
-                "english_level": cand.get("English Level"),
-                "skills": cand.get('skill_hints', []),
-                "total_score": round(stage1_score * 100, 1),
-                "hard_pass_rate": round(detail['exp_score'] * 100, 0),
-                "soft_score": round(detail['soft_sim'], 3),
-                "tags": [f"{int(detail['min_years'])}+ Years"] if detail['min_years'] else [],
-                "raw_exp_years": detail['exp_years'],
-                "_stage1": stage1_score,
-                "_cand_ref": cand,
-                "_detail": detail,
-            })
-            # Smooth progress up to 60%
-            prog = 25 + int((idx + 1) / stage1_count * 35)
-            self._set_progress(prog, f"Stage-1 scoring {idx+1}/{stage1_count}")
-
-        scored_candidates.sort(key=lambda c: c['_stage1'], reverse=True)
-        stage1_top = scored_candidates[: self.stage1_limit]
+        with self._span("vectorize"):
+            try:
+                if getattr(index.vectorizer, "vocabulary_", None):
+                    jd_vec = index.vectorizer.transform([query_text])
+                skill_text = " ".join([*role_keywords, *req_skills])
+                if getattr(index.skill_vectorizer, "vocabulary_", None) and skill_text.strip():
+                    jd_skill_vec = index.skill_vectorizer.transform([skill_text])
+            except Exception as e:
+                self._log(f"Vectorization warning: {e}")
+
+        with self._span("filter"):
+            rows = index.role_rows(position_filter)
+            rows = self._hard_filter_rows(index, jd_analysis, rows)
+            rows = self._skill_prefilter_rows(index, jd_analysis, rows)
+        if index.vector_store is not None:
+            self._set_progress(20, "Retrieving embedding shortlist...")
+            with self._span("retrieval"):
+                rows = self._retrieve_rows(index, query_text, rows)
+        pool_size = len(index) if rows is None else len(rows)
+        if pool_size == 0:
+            self._set_progress(100, "No candidates match the filters.")
+            return []
+        self._set_progress(25, f"Step 2: Stage-1 scoring over {pool_size} candidates (intent + skills)...")
+        # Only the survivors of the partial selection are materialized as result dicts.
+        keep = max(self.stage1_limit, self.top_k)
+        order, stage1_scores, stage1_components, scored_rows = self._stage1_top(
+            index, jd_analysis, jd_vec, jd_skill_vec, rows, keep)
+        with self._span("materialize"):
+            survivors = [
+                self._stage1_result(index, idx, stage1_scores, stage1_components, scored_rows)
+                for idx in order
+            ]
+        stage1_top = survivors[: self.stage1_limit]
         self._set_progress(60, f"Stage-1 complete. Kept top {len(stage1_top)} for deep rerank.")
 
         # Stage-2 LLM deep evaluation on top-N
         final_results = []
+        stage2_pool = stage1_top[: self.stage2_limit]
         use_stage2 = bool(self.llm.api_key)
-        if use_stage2:
-            self._set_progress(65, f"Step 3: Stage-2 LLM rerank on top {min(len(stage1_top), self.stage2_limit)} candidates...")
-            stage2_start = time.time()
-            stage2_total = max(1, min(len(stage1_top), self.stage2_limit))
-            for idx, c in enumerate(stage1_top[: self.stage2_limit]):
-                if time.time() - stage2_start > self.stage2_max_seconds:
-                    self._set_progress(95, "Stage-2 stopped early due to time budget; returning partial results.")
-                    break
-                cand = c.pop('_cand_ref', {})
-                cand_summary = cand.get('Long Description', '')
-                self._set_progress(65 + int((idx + 1) / stage2_total * 30), f"LLM evaluating candidate {c.get('id')} ({idx+1}/{stage2_total})...")
-                llm_score_obj = self.llm.score_candidate_for_jd(query_text, cand_summary)
-                fit_score = 0.0
-                strengths = []
-                risks = []
-                verdict = ""
-                if isinstance(llm_score_obj, dict):
-                    try:
-                        fit_score = float(llm_score_obj.get('fit_score', 0) or 0)
-                    except Exception:
-                        fit_score = 0.0
-                    strengths = llm_score_obj.get('strengths') or []
-                    risks = llm_score_obj.get('risks') or []
-                    verdict = llm_score_obj.get('verdict') or ''
-                combined = (1 - self.stage2_weight) * (c.get('_stage1', 0)) * 100 + self.stage2_weight * fit_score
-                c['total_score'] = round(combined, 1)
-                c['llm_fit_score'] = round(fit_score, 1)
-                c['llm_strengths'] = strengths
-                c['llm_risks'] = risks
-                c['llm_verdict'] = verdict
-                final_results.append(c)
-        else:
+        if use_stage2 and stage2_pool:
+            self._set_progress(65, f"Step 3: Stage-2 LLM rerank on top {len(stage2_pool)} candidates (concurrency {self.stage2_concurrency})...")
+            with self._span("stage2"):
+                self._stage2_rerank(query_text, stage2_pool)
+        elif not use_stage2:
             self._log("Stage-2 skipped: LLM API key missing. Returning Stage-1 scores only.")
-            for c in stage1_top:
-                c.pop('_cand_ref', None)
-                c['llm_fit_score'] = None
-                final_results.append(c)
+        for c in stage2_pool:
+            c.pop('_cand_ref', None)
+            c.setdefault('llm_fit_score', None)
+            final_results.append(c)
 
         # Append remaining Stage-1 results (without LLM) if we still need more up to top_k
         if len(final_results) < self.top_k:
-            for c in stage1_top[self.stage2_limit: self.top_k]:
+            for c in survivors[self.stage2_limit: self.top_k]:
                 c.pop('_cand_ref', None)
                 c['llm_fit_score'] = None
                 final_results.append(c)
@@ -0,0 +1,88 @@
+import os
+import threading
+import time
+from collections import deque
+
+
+class ProgressReporter:
+    """Progress of a running match for the polling UI: percent, status and a bounded, throttled log."""
+
+    def __init__(self, max_lines=None, min_interval=None, min_step=None, echo=None):
+        if max_lines is None:
+            max_lines = int(os.getenv("PROGRESS_LOG_LINES", "200"))
+        if min_interval is None:
+            min_interval = float(os.getenv("PROGRESS_MIN_INTERVAL", "0.5"))
+        if min_step is None:
+            min_step = int(os.getenv("PROGRESS_MIN_STEP", "5"))
+        if echo is None:
+            echo = os.getenv("PROGRESS_ECHO", "1") != "0"
+        self.min_interval = float(min_interval)
+        self.min_step = int(min_step)
+        self.echo = bool(echo)
+        self._lock = threading.Lock()
+        self._lines = deque(maxlen=max(1, int(max_lines)))  # (seq, message)
+        self._seq = 0
+        self._last_emit_time = 0.0
+        self._last_emit_percent = -1
+        self.percent = 0
+        self.status = "Idle"
+
+    def reset(self, status="Idle"):
+        """Clear buffered lines for a new run. Sequence numbers keep increasing."""
+        with self._lock:
+            self._lines.clear()
+            self.percent = 0
+            self.status = status
+            self._last_emit_time = 0.0
+            self._last_emit_percent = -1
+
+    def log(self, message):
+        msg = str(message).strip()
+        if not msg:
+            return
+        with self._lock:
+            self._append(msg)
+        if self.echo:
+            print(msg)
+
+    def update(self, percent, status, throttle=False):
+        """Set percent/status; with ``throttle`` the log line may be skipped."""
+        percent = int(max(0, min(100, percent)))
+        with self._lock:
+            self.percent = percent
+            self.status = status
+            if throttle:
+                now = time.monotonic()
+                if (now - self._last_emit_time < self.min_interval
+                        and percent - self._last_emit_percent < self.min_step):
+                    return
+            msg = str(status).strip()
+            if not msg:
+                return
+            self._append(msg)
+        if self.echo:
+            print(msg)
+
+    def _append(self, msg):
+        self._seq += 1
+        self._lines.append((self._seq, msg))
+        self._last_emit_time = time.monotonic()
+        self._last_emit_percent = self.percent
+
+    def lines(self):
+        with self._lock:
+            return [msg for _, msg in self._lines]
+
+    def snapshot(self, cursor=None):
+        """JSON-ready state. Only lines newer than ``cursor`` are included."""
+        with self._lock:
+            if cursor is None:
+                logs = [msg for _, msg in self._lines]
+            else:
+                logs = [msg for seq, msg in self._lines if seq > cursor]
+            return {
+                "percentage": self.percent,
+                "status": self.status,
+                "logs": logs,
+                "cursor": self._seq,
+            }
@@ -0,0 +1,75 @@
+import re
+from functools import reduce
+
+import numpy as np
+
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#.]*")
+_STOP_TOKENS = frozenset({"and", "or", "the", "with", "of", "in", "for", "to", "on", "a", "an", "at", "by", "as"})
+
+
+def skill_tokens(text):
+    """Normalized tokens of a skill phrase: lowercase, alphanumerics plus + # . (e.g. c++, c#, node.js)."""
+    if not isinstance(text, str):
+        return []
+    tokens = []
+    for t in _TOKEN_RE.findall(text.lower()):
+        t = t.rstrip(".")
+        if t and t not in _STOP_TOKENS:
+            tokens.append(t)
+    return tokens
+
+
+class SkillIndex:
+    """Inverted index from normalized skill tokens to candidate row ids.
+
+    A skill phrase matches a candidate when every token of the phrase occurs in
+    the candidate's skill hints ("AWS S3" needs both "aws" and "s3"). Several
+    phrases are then combined by union or intersection.
+    """
+
+    def __init__(self, postings=None, n_rows=0):
+        self.postings = postings or {}
+        self.n_rows = n_rows
+
+    @classmethod
+    def build(cls, skill_hint_lists):
+        lists = {}
+        n_rows = 0
+        for row, hints in enumerate(skill_hint_lists):
+            n_rows = row + 1
+            seen = set()
+            for hint in hints or []:
+                seen.update(skill_tokens(hint))
+            for token in seen:
+                lists.setdefault(token, []).append(row)
+        postings = {token: np.asarray(rows, dtype=np.intp) for token, rows in lists.items()}
+        return cls(postings, n_rows)
+
+    def extended(self, start_row, skill_hint_lists):
+        """New index with rows ``start_row, start_row + 1, ...`` appended (this one is unchanged)."""
+        added = SkillIndex.build(skill_hint_lists)
+        postings = dict(self.postings)
+        for token, rows in added.postings.items():
+            rows = rows + start_row
+            postings[token] = np.concatenate([postings[token], rows]) if token in postings else rows
+        return SkillIndex(postings, start_row + added.n_rows)
+
+    def phrase_rows(self, phrase):
+        tokens = skill_tokens(phrase)
+        if not tokens:
+            return None
+        empty = np.zeros(0, dtype=np.intp)
+        return reduce(
+            lambda acc, t: np.intersect1d(acc, self.postings.get(t, empty), assume_unique=True),
+            tokens[1:],
+            self.postings.get(tokens[0], empty),
+        )
+
+    def match_rows(self, phrases, mode="union"):
+        """Sorted rows matching the phrases (None when no phrase has usable tokens)."""
+        per_phrase = [r for r in (self.phrase_rows(p) for p in phrases or []) if r is not None]
+        if not per_phrase:
+            return None
+        if mode == "intersection":
+            return reduce(lambda a, b: np.intersect1d(a, b, assume_unique=True), per_phrase)
+        return reduce(np.union1d, per_phrase)
@@ -1,5 +1,6 @@
+import os
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
+from src.ann_index import make_index
 try:
     import chromadb
     from chromadb.config import Settings
@@ -9,13 +10,21 @@ except ImportError:
     print("ChromaDB not found. Using in-memory fallback.")
 
 class VectorStore:
-    def __init__(self, collection_name="resumes"):
+    def __init__(self, collection_name="resumes", backend=None, nlist=None, nprobe=None):
         global CHROMA_AVAILABLE
         self.collection_name = collection_name
         self.client = None
         self.collection = None
-        self.in_memory_vectors = {} # {id: vector}
-        self.in_memory_docs = {}    # {id: document}
+        # In-memory fallback: "flat" (exact) or "ivf" (approximate, nprobe/nlist trade recall for speed)
+        self.backend = backend or os.getenv("VECTOR_INDEX_BACKEND", "flat")
+        self.index = make_index(
+            self.backend,
+            nlist=int(nlist if nlist is not None else os.getenv("VECTOR_IVF_NLIST", "0")),
+            nprobe=int(nprobe if nprobe is not None else os.getenv("VECTOR_IVF_NPROBE", "8")),
+        )
+        self.in_memory_rows = {}  # {id: row in self.index}
+        self.in_memory_ids = []   # row -> id
+        self.in_memory_docs = []  # row -> document
         
         if CHROMA_AVAILABLE:
             try:
@@ -34,10 +43,42 @@ class VectorStore:
                 ids=ids
             )
         else:
-            # Fallback
+            # Fallback: existing ids are overwritten in place, new ids are appended in one batch
+            if len(set(ids)) == len(ids) and not any(doc_id in self.in_memory_rows for doc_id in ids):
+                # All-new batch: hand the embedding matrix to the index without per-row copies.
+                # Ids and documents go in first so a concurrent query never sees a row without them.
+                self.in_memory_ids.extend(ids)
+                self.in_memory_docs.extend(documents)
+                rows = self.index.add(np.asarray(embeddings, dtype=np.float32))
+                for doc_id, row in zip(ids, rows.tolist()):
+                    self.in_memory_rows[doc_id] = row
+                return
+            new_ids, new_docs, new_vectors = [], [], []
+            pending = {}  # id -> position in new_* (ids repeated within this call)
             for i, doc_id in enumerate(ids):
-                self.in_memory_vectors[doc_id] = np.array(embeddings[i])
-                self.in_memory_docs[doc_id] = documents[i]
+                row = self.in_memory_rows.get(doc_id)
+                if row is not None:
+                    self.index.update(row, embeddings[i])
+                    self.in_memory_docs[row] = documents[i]
+                elif doc_id in pending:
+                    new_docs[pending[doc_id]] = documents[i]
+                    new_vectors[pending[doc_id]] = embeddings[i]
+                else:
+                    pending[doc_id] = len(new_ids)
+                    new_ids.append(doc_id)
+                    new_docs.append(documents[i])
+                    new_vectors.append(embeddings[i])
+            if new_ids:
+                rows = self.index.add(np.asarray(new_vectors, dtype=np.float32))
+                for doc_id, row in zip(new_ids, rows.tolist()):
+                    self.in_memory_rows[doc_id] = row
+                self.in_memory_ids.extend(new_ids)
+                self.in_memory_docs.extend(new_docs)
+
+    def count(self):
+        if CHROMA_AVAILABLE and self.collection:
+            return self.collection.count()
+        return len(self.in_memory_ids)
 
     def query(self, query_embedding, n_results=5):
         if CHROMA_AVAILABLE and self.collection:
@@ -51,28 +92,11 @@ class VectorStore:
                 "documents": results['documents'][0]
             }
         else:
-            # Fallback: Scikit-Learn Cosine Similarity
-            ids = list(self.in_memory_vectors.keys())
-            if not ids:
-                return {"ids": [], "distances": [], "documents": []}
-                
-            vectors = np.array(list(self.in_memory_vectors.values()))
-            query_vec = np.array([query_embedding])
-            
-            # Calculate cosine similarity matrix (1xN)
-            # Returns values between -1 and 1 (1 is identical)
-            sims = cosine_similarity(query_vec, vectors)[0]
-            
+            # Fallback: in-process index (exact or IVF) with top-k selection
+            rows, sims = self.index.search(np.asarray(query_embedding, dtype=np.float32), n_results)
             # Convert to "distance" (1 - sim) for consistency with Chroma
-            # Using 1 - sim is standard for cosine distance
-            dists = 1 - sims
-            
-            # Sort
-            sorted_indices = np.argsort(dists)
-            top_indices = sorted_indices[:n_results]
-            
             return {
-                "ids": [ids[i] for i in top_indices],
-                "distances": [dists[i] for i in top_indices],
-                "documents": [self.in_memory_docs[ids[i]] for i in top_indices]
+                "ids": [self.in_memory_ids[r] for r in rows],
+                "distances": [float(1 - s) for s in sims],
+                "documents": [self.in_memory_docs[r] for r in rows]
             }